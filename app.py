@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Keyboard repeater main application."""
 import os
-import threading
+import time
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
@@ -15,39 +15,57 @@ from config_io import (
     clear_log,
     get_default_config_path,
     get_log_path,
+    resolve_profile_path,
     save_default_config,
     write_log,
     DEFAULT_CONFIG,
 )
+from keyboard_canvas import NORMAL, SELECTED
+from keycodes import code_for_name, codes_to_names, key_name
+from layout import KEYBOARD_LAYOUTS
+from output_backends import AUTO_BACKEND, create_backend
+from repeater_engine import LoopOptions
 from ui_builder import build_ui
-from repeater_engine import run_repeat_loop
+from engine_supervisor import EngineSupervisor, FAILED, PAUSED, RESTARTING, RUNNING, STALLED, STOPPED
 from hotkey_manager import HotkeyManager
+from control_server import ControlServer
+from trace_events import disable_tracing, enable_tracing, get_last_recording, get_tracer
+from turbo_mode import DEFAULT_TURBO_INTERVAL_MS, MIN_TURBO_INTERVAL_MS, TurboTrigger
 
 
 class KeyboardRepeaterApp:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Keyboard Repeater")
-        self.root.geometry("835x380")
-        self.root.minsize(680, 360)
+        self.root.geometry("835x440")
+        self.root.minsize(680, 420)
         self.root.resizable(True, True)
 
         self.selected_keys = set()
-        self.key_buttons = {}
         self.running = False
-        self.repeat_thread = None
-        self.stop_event = threading.Event()
+        self.supervisor = EngineSupervisor(on_state_change=self._on_engine_state)
         self.key_controller = KeyController()
-        self.start_hotkey = "f9"
-        self.stop_hotkey = "f10"
+        self.start_hotkey = code_for_name("f9")
+        self.stop_hotkey = code_for_name("f10")
+        self.turbo_key = None
+        self._turbo_active = False
         self._closing = False
 
-        self.hotkey_mgr = HotkeyManager(self.root, self._start_repeat, self._stop_repeat)
-        self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+        # Hotkeys and the turbo trigger call straight into the engine from the listener thread (no Tk round trip).
+        self.turbo = TurboTrigger(self._turbo_hold, self._turbo_release)
+        self.hotkey_mgr = HotkeyManager(self.root, self._request_start, self._request_stop, turbo=self.turbo)
+        self._sync_hotkeys()
         build_ui(self.root, self)
+        self._bind_setting_traces()
         self._center_on_screen()
         self._load_default_config_if_exists()
+        self.supervisor.prewarm()
         self.hotkey_mgr.start_listener()
+        self.control_server = ControlServer(self._control_handlers())
+        try:
+            self.control_server.start()
+        except OSError:
+            self.control_server = None
 
     def _center_on_screen(self):
         self.root.update_idletasks()
@@ -62,29 +80,39 @@ class KeyboardRepeaterApp:
         self.size_hint_var.set(f"{self.root.winfo_width()} × {self.root.winfo_height()}")
 
     def _update_hotkey_button_states(self):
-        start_id, stop_id = self.start_hotkey.lower(), self.stop_hotkey.lower()
-        for key_id, btn_list in self.key_buttons.items():
-            is_hotkey = key_id == start_id or key_id == stop_id
-            for btn in btn_list:
-                if is_hotkey:
-                    btn.config(state=tk.DISABLED, bg="#C0C0C0", activebackground="#C0C0C0", cursor="")
-                    self.selected_keys.discard(key_id)
-                else:
-                    btn.config(state=tk.NORMAL, cursor="hand2")
-                    btn.config(bg="#87CEEB" if key_id in self.selected_keys else "SystemButtonFace",
-                               activebackground="#6BB3DD" if key_id in self.selected_keys else "SystemButtonFace")
-
-    def _toggle_key(self, key_id: str):
-        if key_id in (self.start_hotkey.lower(), self.stop_hotkey.lower()):
+        """Hotkeys and the turbo trigger cannot be repeated: unselect them and grey them out on the keyboard."""
+        disabled = {self.start_hotkey, self.stop_hotkey, self.turbo_key}
+        self.selected_keys -= disabled
+        self.keyboard.repaint(self.selected_keys, disabled)
+
+    def _toggle_key(self, code: int):
+        if code in (self.start_hotkey, self.stop_hotkey, self.turbo_key):
             return
-        if key_id in self.selected_keys:
-            self.selected_keys.discard(key_id)
-            for btn in self.key_buttons.get(key_id, []):
-                btn.config(bg="SystemButtonFace", activebackground="SystemButtonFace")
+        if code in self.selected_keys:
+            self.selected_keys.discard(code)
+            self.keyboard.set_state(code, NORMAL)
         else:
-            self.selected_keys.add(key_id)
-            for btn in self.key_buttons.get(key_id, []):
-                btn.config(bg="#87CEEB", activebackground="#6BB3DD")
+            self.selected_keys.add(code)
+            self.keyboard.set_state(code, SELECTED)
+
+    def _set_keyboard_layout(self, name: str):
+        """Switch the on-screen keyboard layout (see layout.KEYBOARD_LAYOUTS); widen the window if needed."""
+        blocks = KEYBOARD_LAYOUTS.get(name)
+        if blocks is None:
+            return
+        self.keyboard_layout_var.set(name)
+        self.keyboard.set_layout(blocks)
+        # A selected key this layout does not draw could neither be seen nor deselected, yet would keep repeating.
+        hidden = self.selected_keys - {key.code for key in self.keyboard.keys}
+        if hidden:
+            self.selected_keys -= hidden
+            if getattr(self, "_log_enabled", False):
+                write_log(get_log_path(), f"layout '{name}': unselected keys it does not show: {codes_to_names(sorted(hidden))}")
+            self._update_hotkey_button_states()  # repaint, so switching back does not show them selected
+        self.root.update_idletasks()
+        width = self.root.winfo_reqwidth()
+        if width > self.root.winfo_width():
+            self.root.geometry(f"{width}x{self.root.winfo_height()}")
 
     def _get_interval_seconds(self) -> float:
         try:
@@ -95,68 +123,188 @@ class KeyboardRepeaterApp:
             return 1.0
         return val * 60.0 if self.unit_var.get() == "Minutes" else val
 
+    def _get_turbo_interval_seconds(self) -> float:
+        try:
+            ms = float(self.turbo_interval_var.get().strip())
+        except (AttributeError, ValueError):
+            ms = DEFAULT_TURBO_INTERVAL_MS
+        return max(ms, MIN_TURBO_INTERVAL_MS) / 1000.0
+
+    def _get_text_cps(self) -> float | None:
+        """Text-mode chars/sec ceiling, or None for no limit (0 or empty)."""
+        try:
+            cps = float(self.text_cps_var.get().strip())
+        except ValueError:
+            return None
+        return cps if cps > 0 else None
+
     def _begin_capture_hotkey(self, which: str):
         if self.hotkey_mgr.capturing_which:
             messagebox.showinfo("Info", "Please press the key you want to set.")
             return
         if which == "start":
             self.start_hotkey_btn.config(text="Press key...")
+        elif which == "turbo":
+            self.turbo_key_btn.config(text="Press key...")
         else:
             self.stop_hotkey_btn.config(text="Press key...")
         self.hotkey_mgr.capture(which, self._set_captured_hotkey)
 
-    def _set_captured_hotkey(self, which: str, name: str):
+    def _set_captured_hotkey(self, which: str, code: int):
+        label = key_name(code).upper()
+        bound = {"start": self.start_hotkey, "stop": self.stop_hotkey, "turbo": self.turbo_key}
+        clash = next((other for other, other_code in bound.items() if other != which and other_code == code), None)
+        if clash is not None:
+            # The listener matches the turbo key first, then start, then stop: a shared key would silently lose one of them.
+            current = bound[which]
+            btn = {"start": self.start_hotkey_btn, "stop": self.stop_hotkey_btn, "turbo": self.turbo_key_btn}[which]
+            btn.config(text=key_name(current).upper() if current is not None else "None")
+            messagebox.showwarning("Warning", f"{label} is already the {clash} key. Please pick another key.")
+            return
         if which == "start":
-            self.start_hotkey = name
-            self.start_hotkey_var.set(name.upper())
-            self.start_hotkey_btn.config(text=name.upper())
+            self.start_hotkey = code
+            self.start_hotkey_var.set(label)
+            self.start_hotkey_btn.config(text=label)
+        elif which == "turbo":
+            self.turbo_key = code
+            self.turbo_key_btn.config(text=label)
         else:
-            self.stop_hotkey = name
-            self.stop_hotkey_var.set(name.upper())
-            self.stop_hotkey_btn.config(text=name.upper())
-        self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+            self.stop_hotkey = code
+            self.stop_hotkey_var.set(label)
+            self.stop_hotkey_btn.config(text=label)
+        self._sync_hotkeys()
+        self._update_hotkey_button_states()
+
+    def _clear_turbo_key(self):
+        self.turbo_key = None
+        self.turbo_key_btn.config(text="None")
+        self._sync_hotkeys()
         self._update_hotkey_button_states()
 
+    def _sync_hotkeys(self):
+        self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+        self.hotkey_mgr.set_turbo_key(self.turbo_key)
+
+    def _bind_setting_traces(self):
+        """Mirror Tk settings into plain attributes so the hotkey, engine and control threads never call into Tk."""
+        def sync(*_):
+            self._interval_sec = self._get_interval_seconds()
+            self._target_exe = self.target_exe_var.get().strip() if getattr(self, "target_exe_var", None) else ""
+            self._target_all_windows = bool(getattr(self, "target_all_windows_var", None) and self.target_all_windows_var.get())
+            self._log_enabled = bool(self.log_enabled_var.get())
+            self._turbo_interval_sec = self._get_turbo_interval_seconds()
+            self._backend_name = self.backend_var.get() or AUTO_BACKEND
+            self._text = self.text_var.get() if self.text_mode_var.get() else None
+            self._text_cps = self._get_text_cps()
+        for var in (self.interval_var, self.unit_var, self.log_enabled_var, self.turbo_interval_var, self.backend_var,
+                    self.text_mode_var, self.text_var, self.text_cps_var,
+                    getattr(self, "target_exe_var", None), getattr(self, "target_all_windows_var", None)):
+            if var is not None:
+                var.trace_add("write", sync)
+        sync()
+
     def _start_repeat(self):
+        self._request_start()
+
+    def _stop_repeat(self):
+        self._request_stop()
+
+    def _request_start(self, requested_at: float | None = None, backend: str | None = None):
+        """
+        Start repeating. Safe from any thread; requested_at (perf_counter) is the hotkey press time.
+        backend overrides the configured output backend for this job (see output_backends).
+        """
+        requested_at = requested_at or time.perf_counter()
         if getattr(self, "_closing", False):
             return
         if self.running:
             return
-        if not self.selected_keys:
-            messagebox.showwarning("Warning", "Please select at least one key to repeat.")
+        if not self._has_payload():
+            msg = "Please enter the text to type." if self._text is not None else "Please select at least one key to repeat."
+            self.root.after(0, lambda: messagebox.showwarning("Warning", msg))
             return
         self.running = True
-        self.stop_event.clear()
-        self.status_var.set("Running")
-        self.status_label.config(foreground="green")
-        interval = self._get_interval_seconds()
-        target_exe_getter = lambda: self.target_exe_var.get().strip() if getattr(self, "target_exe_var", None) else ""
-        log_enabled = getattr(self, "log_enabled_var", None) and self.log_enabled_var.get()
-        if log_enabled:
-            try:
-                clear_log(get_log_path())
-            except Exception:
-                pass
-        log_func = (lambda msg: write_log(get_log_path(), msg)) if log_enabled else None
-        self.repeat_thread = threading.Thread(
-            target=run_repeat_loop,
-            args=(self.key_controller, lambda: self.selected_keys, interval, self.stop_event),
-            kwargs={"target_exe_getter": target_exe_getter, "log_func": log_func},
-            daemon=True
+        self._turbo_active = False
+        self._start_job(self._interval_sec, requested_at, clear_log=True, backend=backend)
+
+    def _has_payload(self) -> bool:
+        return bool(self._text) if self._text is not None else bool(self.selected_keys)
+
+    def _start_job(self, interval_sec: float, requested_at: float, clear_log: bool = False, backend: str | None = None):
+        log_func = (lambda msg: write_log(get_log_path(), msg)) if self._log_enabled else None
+        self.supervisor.log_func = log_func
+        self.supervisor.engine.log_func = log_func
+        backend = backend or self._backend_name
+        try:
+            output = create_backend(backend, self.key_controller)
+        except Exception as e:
+            if log_func:
+                log_func(f"output backend '{backend}' unavailable ({e}), using auto")
+            output = None
+        self.supervisor.start(
+            self.key_controller, lambda: self.selected_keys, interval_sec,
+            requested_at=requested_at,
+            before_run=_clear_log_quietly if clear_log and self._log_enabled else None,
+            target_exe_getter=lambda: self._target_exe,
+            log_func=log_func,
+            target_all_windows_getter=lambda: self._target_all_windows,
+            options=LoopOptions(backend=output, text=self._text, max_cps=self._text_cps),
         )
-        self.repeat_thread.start()
 
-    def _stop_repeat(self):
+    def _request_stop(self, requested_at: float | None = None):
+        """Stop repeating. Safe from any thread."""
         self.running = False
-        self.stop_event.set()
+        self._turbo_active = False
+        self.supervisor.stop(requested_at)
+
+    def _turbo_hold(self, pressed_at: float):
+        """Turbo trigger pressed (listener thread): repeat at the turbo rate until released. Ignored while the toggle mode runs."""
+        if getattr(self, "_closing", False) or self.running or not self._has_payload():
+            return
+        tracer = get_tracer()
+        if tracer:
+            tracer.instant("turbo_hold", "hotkey")
+        self._turbo_active = True
+        self._start_job(self._turbo_interval_sec, pressed_at)
+
+    def _turbo_release(self, released_at: float):
+        """Turbo trigger released (listener or debounce thread); released_at is the physical release time."""
+        if not self._turbo_active:
+            return
+        tracer = get_tracer()
+        if tracer:
+            tracer.instant("turbo_release", "hotkey")
+        self._turbo_active = False
+        self.supervisor.stop(released_at)
+
+    def _on_engine_state(self, state: str):
+        """Supervisor callback (any thread): show the engine's real state in the status label."""
         if getattr(self, "_closing", False):
             return
-        if not getattr(self, "status_var", None):
+        try:
+            self.root.after(0, lambda: self._show_engine_state(state))
+        except Exception:
+            pass
+
+    _STATE_DISPLAY = {
+        RUNNING: ("Running", "green"),
+        STALLED: ("Stalled", "orange"),
+        RESTARTING: ("Restarting", "orange"),
+        PAUSED: ("Paused", "gray"),
+        FAILED: ("Failed", "red"),
+        STOPPED: ("Stopped", ""),
+    }
+
+    def _show_engine_state(self, state: str):
+        if getattr(self, "_closing", False) or not getattr(self, "status_var", None):
             return
+        if state == FAILED:
+            self.running = False
+        text, color = self._STATE_DISPLAY.get(state, (state, ""))
         try:
-            self.status_var.set("Stopped")
+            self.status_var.set(text)
             if getattr(self, "status_label", None):
-                self.status_label.config(foreground="")
+                self.status_label.config(foreground=color)
         except Exception:
             pass
 
@@ -180,7 +328,7 @@ class KeyboardRepeaterApp:
             messagebox.showerror("Error", "Load failed: " + str(e))
             return
         apply_config_to_app(data, self)
-        self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+        self._sync_hotkeys()
         self._update_hotkey_button_states()
         messagebox.showinfo("Loaded", "Config loaded:\n" + path)
 
@@ -192,11 +340,80 @@ class KeyboardRepeaterApp:
         try:
             data = config_load(path)
             apply_config_to_app(data, self)
-            self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+            self._sync_hotkeys()
             self._update_hotkey_button_states()
         except Exception:
             pass
 
+    def _apply_loaded_config(self, data: dict):
+        apply_config_to_app(data, self)
+        self._sync_hotkeys()
+        self._update_hotkey_button_states()
+
+    def _control_handlers(self) -> dict:
+        """Commands for the local control API (see control_server). Called off the Tk thread."""
+        return {
+            "ping": lambda req: {},
+            "start": self._control_start,
+            "stop": self._control_stop,
+            "pause": lambda req: self.supervisor.pause() or {"state": self.supervisor.state},
+            "resume": lambda req: self.supervisor.resume() or {"state": self.supervisor.state},
+            "status": self._control_status,
+            "load_profile": self._control_load_profile,
+            "show": self._control_show,
+        }
+
+    def _control_start(self, req):
+        self._request_start(backend=req.get("backend"))
+        return {"accepted": True, "running": self.running}
+
+    def _control_stop(self, req):
+        self._request_stop()
+        return {"running": False}
+
+    def _control_status(self, req):
+        snapshot = self.supervisor.snapshot()
+        return {
+            "running": self.running,
+            "state": snapshot["state"],
+            "backend": self._backend_name,
+            "selected_keys": codes_to_names(sorted(self.selected_keys)),
+            "text_mode": self._text is not None,
+            "stats": snapshot["engine"],
+            "engine": snapshot["engine_metrics"],
+            "supervisor": snapshot["supervisor"],
+            "turbo": dict(self.turbo.metrics, active=self._turbo_active, key=key_name(self.turbo_key) if self.turbo_key is not None else None),
+        }
+
+    def _control_load_profile(self, req):
+        """Load a profile by "name" (profiles folder) or "path"; the file is read here, applied on the Tk thread."""
+        profile = req.get("path") or req.get("name")
+        if not profile:
+            raise ValueError("load_profile needs 'name' or 'path'")
+        path = resolve_profile_path(profile)
+        data = config_load(path)
+        self.root.after(0, lambda: self._apply_loaded_config(data))
+        return {"path": path}
+
+    def _control_show(self, req):
+        self.root.after(0, self._bring_to_front)
+        return {}
+
+    def _bring_to_front(self):
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+
+    def apply_launch_args(self, profile: str | None = None, start: bool = False, stop: bool = False):
+        """Apply command-line arguments of the first launch (same effect as a forwarded handoff)."""
+        if profile:
+            try:
+                self._apply_loaded_config(config_load(resolve_profile_path(profile)))
+            except Exception as e:
+                messagebox.showerror("Error", "Load failed: " + str(e))
+        if start and not stop:
+            self.root.after(0, self._start_repeat)
+
     def _confirm_save_default(self):
         """Save current settings as default; next startup will load them."""
         try:
@@ -208,14 +425,20 @@ class KeyboardRepeaterApp:
     def _clear_to_defaults(self):
         """Restore all settings to default values."""
         apply_config_to_app(DEFAULT_CONFIG, self)
-        self.hotkey_mgr.set_hotkeys(self.start_hotkey, self.stop_hotkey)
+        self._sync_hotkeys()
         self._update_hotkey_button_states()
         messagebox.showinfo("Clear", "Restored to default values.")
 
     def _view_log(self):
-        """Open a window showing the repeater log file (last 500 lines) with Refresh button."""
+        """Open a window showing the repeater log file (last 500 lines) with Refresh button. An open one is reused."""
+        win = getattr(self, "_log_window", None)
+        if win is not None and win.winfo_exists():
+            win.reload()
+            win.deiconify()
+            win.lift()
+            return
         path = get_log_path()
-        win = tk.Toplevel(self.root)
+        win = self._log_window = tk.Toplevel(self.root)
         win.title("Repeater Log")
         win.geometry("700x400")
         win.minsize(400, 200)
@@ -244,6 +467,7 @@ class KeyboardRepeaterApp:
         text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         text.config(yscrollcommand=scroll.set)
+        win.reload = load_log
         load_log()
         win.update_idletasks()
         w, h = win.winfo_width(), win.winfo_height()
@@ -253,6 +477,29 @@ class KeyboardRepeaterApp:
         y -= 80
         win.geometry(f"+{max(0, x)}+{max(0, y)}")
 
+    def _toggle_trace(self):
+        """Turn engine/hotkey/config tracing on or off (takes effect for the next repeat start)."""
+        if self.trace_enabled_var.get():
+            enable_tracing()
+        else:
+            disable_tracing()
+
+    def _export_trace(self):
+        """Save recorded trace events as Chrome trace-event JSON (open in Perfetto or chrome://tracing)."""
+        tracer = get_last_recording()
+        if tracer is None:
+            messagebox.showinfo("Trace", "Nothing recorded yet. Tick \"Trace\", start repeat, then export.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="repeater_trace.json",
+                                            filetypes=[("Chrome trace", "*.json"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            tracer.dump(path)
+            messagebox.showinfo("Trace", "Trace saved to:\n" + path)
+        except Exception as e:
+            messagebox.showerror("Error", "Export failed: " + str(e))
+
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self.root.mainloop()
@@ -265,9 +512,20 @@ class KeyboardRepeaterApp:
         try:
             self._stop_repeat()
             self.hotkey_mgr.stop_listener()
+            self.supervisor.engine.shutdown()
+            if self.control_server:
+                self.control_server.stop()
         except Exception:
             pass
         try:
             self.root.destroy()
         except Exception:
             pass
+
+
+def _clear_log_quietly():
+    """Truncate the repeater log at the start of a run (runs on the engine thread)."""
+    try:
+        clear_log(get_log_path())
+    except Exception:
+        pass
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: engine cost per round with a whole round handed to the backend in one send_many call,
+versus one call per key, on the null backend (so only engine + dispatch overhead is measured).
+Runs the real loop on a virtual clock. Run from the repo root: python benchmarks/bench_backends.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_clock import VirtualClock
+from keycodes import code_for_name
+from output_backends import NullBackend
+from repeater_engine import LoopOptions, run_repeat_loop
+
+ROUNDS = 20000
+
+
+class _PerKeyNullBackend(NullBackend):
+    """Same output, but dispatched one key per call, like the engine did before send_many."""
+    supports_batching = False
+
+    def send_many(self, events, target=None) -> int:
+        sent = 0
+        for code in events:
+            sent += NullBackend.send_many(self, (code,), target)
+        return sent
+
+
+def _run(backend, keys, windows):
+    clock = VirtualClock()
+    stop_event = threading.Event()
+    clock.call_at(ROUNDS - 0.5, stop_event.set)
+    stats = {}
+    t0 = time.perf_counter()
+    run_repeat_loop(None, lambda: keys, 1.0, stop_event, target_exe_getter=lambda: "game" if windows else "",
+                    options=LoopOptions(backend=backend, stats=stats, clock=clock,
+                                        window_finder=lambda exe, all_windows: windows))
+    elapsed = time.perf_counter() - t0
+    return elapsed / stats["rounds"] * 1e6, backend.calls
+
+
+def main():
+    for n_keys in (1, 8, 32):
+        keys = [code_for_name(c) for c in "abcdefghijklmnopqrstuvwxyz012345"[:n_keys]]
+        for windows in ([], [0x10]):
+            where = "window    " if windows else "foreground"
+            batched_us, batched_calls = _run(NullBackend(), keys, windows)
+            per_key_us, per_key_calls = _run(_PerKeyNullBackend(), keys, windows)
+            print(f"{n_keys:2d} keys, {where}: send_many {batched_us:6.2f} us/round ({batched_calls} calls)   "
+                  f"per key {per_key_us:6.2f} us/round ({per_key_calls} calls)")
+
+
+if __name__ == "__main__":
+    main()
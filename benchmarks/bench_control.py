@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: control API round-trip latency (ping over a persistent connection).
+Run from the repo root: python benchmarks/bench_control.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control_server import ControlClient, ControlServer, get_control_address
+
+ROUNDS = 5000
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    token_path = os.path.join(workdir, "bench.token")
+    address = get_control_address()
+    if isinstance(address, str):
+        address = os.path.join(workdir, "bench.sock")
+    else:
+        address = ("127.0.0.1", 0)
+    server = ControlServer({"ping": lambda req: {}, "status": lambda req: {"running": False, "stats": {"rounds": 0}}},
+                           address, token_path)
+    server.start()
+    if not isinstance(address, str):
+        server.address = address = server._sock.getsockname()
+    try:
+        t0 = time.perf_counter()
+        with ControlClient(address, token_path=token_path):
+            pass
+        print(f"connect + handshake: {(time.perf_counter() - t0) * 1e6:.0f} us")
+        with ControlClient(address, token_path=token_path) as client:
+            for _ in range(200):  # warm up
+                client.request("ping")
+            for cmd in ("ping", "status"):
+                samples = []
+                for _ in range(ROUNDS):
+                    t0 = time.perf_counter()
+                    reply = client.request(cmd)
+                    samples.append(time.perf_counter() - t0)
+                    assert reply["ok"]
+                samples.sort()
+                p50 = samples[len(samples) // 2] * 1e6
+                p99 = samples[int(len(samples) * 0.99)] * 1e6
+                print(f"{cmd:7s} round trip: p50={p50:.0f} us  p99={p99:.0f} us  ({ROUNDS} requests)")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: start-command -> first-keystroke and stop-command -> loop-exit latency of the persistent
+engine thread, over many rapid start/stop cycles, with a check that only one loop ever ran at a time.
+Run from the repo root: python benchmarks/bench_engine_start.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_supervisor import EngineSupervisor
+from keycodes import code_for_name
+
+CYCLES = 500
+
+
+class _NullController:
+    """Counts presses and signals the first one of each job."""
+
+    def __init__(self):
+        self.pressed = threading.Event()
+        self.presses = 0
+
+    def press(self, key):
+        self.presses += 1
+        self.pressed.set()
+
+    def release(self, key):
+        pass
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    controller = _NullController()
+    keys = [code_for_name("a")]
+    supervisor = EngineSupervisor()
+    supervisor.prewarm()
+    start_ms, stop_ms = [], []
+    for _ in range(CYCLES):
+        controller.pressed.clear()
+        t0 = time.perf_counter()
+        supervisor.start(controller, lambda: keys, 10.0, requested_at=t0)
+        assert controller.pressed.wait(2.0), "no keystroke after start"
+        start_ms.append((time.perf_counter() - t0) * 1000)
+        t1 = time.perf_counter()
+        supervisor.stop(t1)
+        while supervisor.engine.metrics["active_loops"]:
+            time.sleep(0)
+        stop_ms.append((time.perf_counter() - t1) * 1000)
+    # Quick stop/start pairs without waiting: still never more than one loop.
+    for _ in range(CYCLES):
+        supervisor.start(controller, lambda: keys, 10.0)
+        supervisor.stop()
+    time.sleep(0.2)
+    metrics = supervisor.engine.metrics
+    assert metrics["max_active_loops"] == 1, metrics
+    print(f"start -> first key: p50={_percentile(start_ms, 0.5):.3f} ms  p99={_percentile(start_ms, 0.99):.3f} ms")
+    print(f"stop -> loop exit:  p50={_percentile(stop_ms, 0.5):.3f} ms  p99={_percentile(stop_ms, 0.99):.3f} ms")
+    print(f"jobs={metrics['jobs']} max_active_loops={metrics['max_active_loops']} threads={threading.active_count()}")
+
+
+if __name__ == "__main__":
+    main()
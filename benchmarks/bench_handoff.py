@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: second-launch handoff. A stand-in instance serves the control API; we time
+(1) the in-process handoff (connect + forward), and (2) a full `keyboard_repeater.py --start`
+process that forwards and exits, compared with a bare `python -c pass`.
+Run from the repo root: python benchmarks/bench_handoff.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Point the config folder (and with it the control socket and lock) at a temp dir.
+_home = tempfile.mkdtemp()
+os.environ["HOME"] = _home
+os.environ["APPDATA"] = _home
+
+from control_server import ControlServer
+from single_instance import acquire_or_forward, launch_commands
+
+RUNS_IN_PROCESS = 2000
+RUNS_PROCESS = 20
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def _time_process(args):
+    samples = []
+    for _ in range(RUNS_PROCESS):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True, env=os.environ)
+        samples.append(time.perf_counter() - t0)
+    return _percentiles(samples)
+
+
+def main():
+    received = []
+    server = ControlServer({
+        "start": lambda req: received.append("start") or {"accepted": True},
+        "show": lambda req: {},
+    })
+    server.start()
+    try:
+        commands = launch_commands(start=True)
+        samples = []
+        for _ in range(RUNS_IN_PROCESS):
+            t0 = time.perf_counter()
+            lock, replies = acquire_or_forward(commands)
+            samples.append(time.perf_counter() - t0)
+            assert lock is None and replies[0]["ok"]
+        p50, p95 = _percentiles(samples)
+        print(f"in-process handoff:        p50={p50:.3f} ms  p95={p95:.3f} ms")
+
+        p50, p95 = _time_process(["-c", "pass"])
+        print(f"python -c pass:            p50={p50:.1f} ms  p95={p95:.1f} ms")
+        p50, p95 = _time_process(["keyboard_repeater.py", "--start"])
+        print(f"keyboard_repeater --start: p50={p50:.1f} ms  p95={p95:.1f} ms  (forwarded, no GUI)")
+        assert len(received) == RUNS_IN_PROCESS + RUNS_PROCESS
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: on-screen keyboard cost. Geometry + hit index build and hit-test lookups always run;
+with a display (e.g. under Xvfb) it also compares building and bulk-recoloring the single-Canvas
+keyboard against the old one-tk.Button-per-key layout, for every layout in layout.KEYBOARD_LAYOUTS.
+Run from the repo root: python benchmarks/bench_keyboard_canvas.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyboard_canvas import KeyboardCanvas, build_hit_index, hit_test, layout_geometry
+from keycodes import code_for_name
+from layout import KEYBOARD_LAYOUTS
+
+REPEAT = 20
+HITS = 100000
+
+
+def _ms(func, repeat=REPEAT):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _build_buttons(tk, parent, blocks):
+    """The previous widget-per-key keyboard: a Frame per row, a Button per key."""
+    buttons = {}
+    for block in blocks:
+        block_f = tk.Frame(parent)
+        block_f.pack(side=tk.LEFT, padx=(0, 12), anchor=tk.N)
+        for indent_px, items in block:
+            row_f = tk.Frame(block_f)
+            row_f.pack(fill=tk.X, pady=1)
+            if indent_px:
+                tk.Frame(row_f, width=indent_px).pack(side=tk.LEFT)
+            for item in items:
+                if not item[1]:
+                    continue
+                width = item[2] if len(item) > 2 else (4 if len(item[0]) <= 2 else 6)
+                btn = tk.Button(row_f, text=item[0], width=int(width), relief=tk.RAISED, bd=2)
+                btn.pack(side=tk.LEFT, padx=1, pady=1)
+                buttons.setdefault(code_for_name(item[1]), []).append(btn)
+    return buttons
+
+
+def _bench_headless():
+    for name, blocks in KEYBOARD_LAYOUTS.items():
+        keys, width, height = layout_geometry(blocks)
+        build = _ms(lambda: build_hit_index(layout_geometry(blocks)[0]))
+        index = build_hit_index(keys)
+        rnd = random.Random(1)
+        points = [(rnd.uniform(0, width), rnd.uniform(0, height)) for _ in range(HITS)]
+        t0 = time.perf_counter()
+        hits = sum(1 for x, y in points if hit_test(index, x, y) is not None)
+        per_hit = (time.perf_counter() - t0) / HITS * 1e6
+        for key in keys:  # every key's centre must resolve to that key
+            assert hit_test(index, (key.x0 + key.x1) / 2, (key.y0 + key.y1) / 2) is key, key
+        print(f"{name:8s} {len(keys):3d} keys {width}x{height}px: geometry+index {build:.3f} ms, "
+              f"hit test {per_hit:.2f} us ({hits * 100 // HITS}% of random points on a key)")
+
+
+def _bench_tk():
+    import tkinter as tk
+    root = tk.Tk()
+    for name, blocks in KEYBOARD_LAYOUTS.items():
+        codes = {key.code for key in layout_geometry(blocks)[0]}
+        half = set(list(codes)[::2])
+
+        def build_canvas():
+            frame = tk.Frame(root)
+            kb = KeyboardCanvas(frame, blocks, lambda code: None)
+            kb.canvas.pack()
+            root.update_idletasks()
+            frame.destroy()
+
+        def build_buttons():
+            frame = tk.Frame(root)
+            frame.pack()
+            _build_buttons(tk, frame, blocks)
+            root.update_idletasks()
+            frame.destroy()
+
+        kb = KeyboardCanvas(root, blocks, lambda code: None)
+        kb.canvas.pack()
+        frame = tk.Frame(root)
+        frame.pack()
+        buttons = _build_buttons(tk, frame, blocks)
+        state = [False]
+
+        def repaint_canvas():
+            state[0] = not state[0]
+            kb.repaint(half if state[0] else codes - half, set())
+            root.update_idletasks()
+
+        def repaint_buttons():
+            state[0] = not state[0]
+            selected = half if state[0] else codes - half
+            for code, btns in buttons.items():
+                for btn in btns:
+                    btn.config(bg="#87CEEB" if code in selected else "#F0F0F0")
+            root.update_idletasks()
+
+        print(f"{name:8s} build: canvas {_ms(build_canvas):7.2f} ms   buttons {_ms(build_buttons):7.2f} ms")
+        print(f"{name:8s} recolor all keys: canvas {_ms(repaint_canvas):7.2f} ms   buttons {_ms(repaint_buttons):7.2f} ms")
+        kb.canvas.destroy()
+        frame.destroy()
+    root.destroy()
+
+
+def main():
+    _bench_headless()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("no $DISPLAY: skipping Tk build/recolor comparison (run under xvfb-run)")
+        return
+    _bench_tk()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: simulate a 12-hour repeat schedule on the virtual clock and check the emitted timeline.
+Run from the repo root: python benchmarks/bench_simulation.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import Simulation
+
+HOURS = 12
+INTERVAL = 11
+
+
+def main():
+    sim = Simulation(["a", "b"], INTERVAL, target_exe="client.exe", windows=[0x10, 0x20], all_windows=True)
+    sim.set_windows_at(3600, [])            # target closed for an hour
+    sim.set_windows_at(7200, [0x10])        # one instance comes back
+    sim.set_selection_at(5 * 3600, ["c"])  # selection change
+    t0 = time.perf_counter()
+    timeline = sim.run(HOURS * 3600)
+    elapsed = time.perf_counter() - t0
+
+    rounds = {t for t, action, _, _ in timeline}
+    sends = [e for e in timeline if e[1] == "send"]
+    assert all(t % INTERVAL == 0 for t in rounds), "rounds must fall on interval boundaries"
+    assert not [e for e in sends if 3600 <= e[0] < 7200], "no sends while the target is missing"
+    assert all(e[2] == "c" for e in sends if e[0] >= 5 * 3600), "selection change must take effect"
+    assert {e[3] for e in sends if e[0] < 3600} == {0x10, 0x20}, "both windows served before 1h"
+    print(f"simulated {HOURS} h ({len(rounds)} rounds, {len(sends)} key sends) in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: text mode throughput. Types a mixed ASCII/Unicode phrase through the engine on the null
+backend (real clock) with several chars/sec ceilings and reports the achieved rate, plus the
+cost of segmenting the text once versus on every round.
+Run from the repo root: python benchmarks/bench_text.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from output_backends import NullBackend
+from repeater_engine import TEXT_CHUNK_CHARS, LoopOptions, run_repeat_loop
+
+TEXT = "Hello, wörld — ünïcödé ✓ 12345\n" * 40
+RUN_SEC = 1.0
+
+
+def _run(max_cps):
+    backend = NullBackend()
+    stop_event = threading.Event()
+    stats = {}
+    timer = threading.Timer(RUN_SEC, stop_event.set)
+    timer.start()
+    t0 = time.perf_counter()
+    run_repeat_loop(None, lambda: (), 0.001, stop_event,
+                    options=LoopOptions(backend=backend, text=TEXT, max_cps=max_cps, stats=stats))
+    elapsed = time.perf_counter() - t0
+    return stats["chars_sent"] / elapsed, stats["rounds"], backend.calls
+
+
+def main():
+    backend = NullBackend()
+    n = 2000
+    t0 = time.perf_counter()
+    chunks = backend.prepare_text(TEXT, TEXT_CHUNK_CHARS)
+    for _ in range(n):
+        for chunk in chunks:
+            backend.type_text(chunk)
+    once = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for _ in range(n):
+        for chunk in backend.prepare_text(TEXT, TEXT_CHUNK_CHARS):
+            backend.type_text(chunk)
+    per_round = (time.perf_counter() - t0) / n * 1e6
+    print(f"{len(TEXT)} chars/round: segmented once {once:.1f} us/round, re-segmented every round {per_round:.1f} us/round")
+    for max_cps in (200, 1000, 5000, None):
+        cps, rounds, calls = _run(max_cps)
+        print(f"ceiling {str(max_cps or 'none'):>5} chars/s -> achieved {cps:10.0f} chars/s ({rounds} rounds, {calls} type_text calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: hold-to-repeat reaction latency. Feeds TurboTrigger the press/release events the hotkey
+listener would deliver (including Windows-style and X11-style OS autorepeat) and measures
+physical press -> first key and physical release -> loop exit, plus keys sent after the release.
+Run from the repo root: python benchmarks/bench_turbo.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_supervisor import EngineSupervisor
+from keycodes import code_for_name
+from turbo_mode import TURBO_DEBOUNCE_SEC, TurboTrigger
+
+HOLDS = 200
+HOLD_SEC = 0.1
+AUTOREPEAT_SEC = 0.033  # ~30 Hz OS key repeat
+TURBO_INTERVAL_SEC = 0.01
+
+
+class _TimedController:
+    """Records the perf_counter time of every press."""
+
+    def __init__(self):
+        self.pressed = threading.Event()
+        self.times = []
+
+    def press(self, key):
+        self.times.append(time.perf_counter())
+        self.pressed.set()
+
+    def release(self, key):
+        pass
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _run(style: str, debounce_sec: float):
+    controller = _TimedController()
+    keys = [code_for_name("a")]
+    supervisor = EngineSupervisor()
+    supervisor.prewarm()
+    stopped_at = []
+
+    def on_release(at):
+        supervisor.stop(at)
+        stopped_at.append(time.perf_counter())
+
+    trigger = TurboTrigger(
+        lambda at: supervisor.start(controller, lambda: keys, TURBO_INTERVAL_SEC, requested_at=at),
+        on_release,
+        debounce_sec=debounce_sec,
+    )
+    press_ms, release_ms, late_keys = [], [], 0
+    for _ in range(HOLDS):
+        controller.pressed.clear()
+        t_press = time.perf_counter()
+        trigger.press(t_press)
+        assert controller.pressed.wait(2.0), "no keystroke after press"
+        press_ms.append((controller.times[-1] - t_press) * 1000)
+        deadline = t_press + HOLD_SEC
+        while time.perf_counter() < deadline:
+            time.sleep(AUTOREPEAT_SEC)
+            if style == "x11":
+                trigger.release()
+            trigger.press()
+        t_release = time.perf_counter()
+        trigger.release(t_release)
+        while trigger.held or supervisor.engine.metrics["active_loops"]:
+            time.sleep(0.0005)
+        release_ms.append((time.perf_counter() - t_release) * 1000)
+        late_keys += sum(1 for t in controller.times if t > stopped_at[-1])
+        controller.times.clear()
+    supervisor.engine.shutdown()
+    m = trigger.metrics
+    print(f"[{style} autorepeat, debounce {debounce_sec * 1000:.0f} ms] holds={m['holds']} "
+          f"ignored presses={m['autorepeat_presses']} ignored releases={m['autorepeat_releases']}")
+    print(f"  press -> first key:   p50={_percentile(press_ms, 0.5):.3f} ms  p99={_percentile(press_ms, 0.99):.3f} ms")
+    print(f"  release -> loop exit: p50={_percentile(release_ms, 0.5):.3f} ms  p99={_percentile(release_ms, 0.99):.3f} ms")
+    print(f"  keys sent after the release was confirmed: {late_keys}")
+    assert m["holds"] == HOLDS, "autorepeat restarted the turbo job"
+    assert supervisor.engine.metrics["max_active_loops"] == 1
+
+
+def main():
+    _run("windows", 0.0)
+    _run("x11", TURBO_DEBOUNCE_SEC or 0.025)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end delivery latency probe (listener loopback). Drives the real repeat loop through an
+output backend with tag keys (F13-F20 by default, which no app should act on), stamps every send and
+matches it to the key event an observer sees come back: a pynput keyboard.Listener (as the global
+hotkeys use) for backends that send to the focused window, or a small Tk probe window used as the
+target window for window-only backends (x11 / win32). Reports delivery-latency percentiles and the
+drop rate per backend, rate and engine clock ("event" = engine_clock.REAL_CLOCK, "precise" =
+engine_clock.PreciseClock). The null backend delivers nothing and is the negative control.
+
+Needs a display. On a headless Linux box run it under Xvfb:
+    xvfb-run -a python benchmarks/latency_probe.py --backends pynput,x11 --rates 10,100,500
+Run from the repo root: python benchmarks/latency_probe.py [--backends ...] [--rates ...] [--clocks ...]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_clock import REAL_CLOCK, PreciseClock
+from keycodes import KEY_NAMES, code_for_name
+from output_backends import OutputBackend, create_backend
+from repeater_engine import LoopOptions, run_repeat_loop
+
+DEFAULT_TAG_KEYS = ",".join(f"f{i}" for i in range(13, 21))
+DEFAULT_RATES = "10,100,500"
+DEFAULT_COUNT = 200
+# A send not seen within this long is a drop; also how long to wait for stragglers after the last send.
+SETTLE_SEC = 0.5
+CLOCKS = {"event": lambda: REAL_CLOCK, "precise": PreciseClock}
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class _Matcher:
+    """Pairs sends with observed key events: per tag key, the oldest outstanding send is matched first."""
+
+    def __init__(self, codes, stale_sec: float = SETTLE_SEC):
+        self.stale_sec = stale_sec
+        self._pending = {code: deque() for code in codes}
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.unmatched = 0
+        self.dropped = 0
+
+    def sent(self, code: int, at: float) -> None:
+        with self._lock:
+            self._pending[code].append(at)
+
+    def observed(self, code, at: float) -> None:
+        queue = self._pending.get(code)
+        if queue is None:  # not a tag key (e.g. the user typing)
+            return
+        with self._lock:
+            while queue and at - queue[0] > self.stale_sec:
+                queue.popleft()
+                self.dropped += 1
+            if queue:
+                self.latencies.append(at - queue.popleft())
+            else:
+                self.unmatched += 1
+
+    def finish(self) -> None:
+        """Count every send still outstanding as dropped."""
+        with self._lock:
+            for queue in self._pending.values():
+                self.dropped += len(queue)
+                queue.clear()
+
+
+class _TaggingBackend(OutputBackend):
+    """Wraps a backend: stamps each key just before the inner send_many and stops the loop after count keys."""
+
+    def __init__(self, inner: OutputBackend, matcher: _Matcher, count: int, stop_event: threading.Event):
+        self.inner = inner
+        self.name = inner.name
+        self.supports_foreground = inner.supports_foreground
+        self.supports_targeting = inner.supports_targeting
+        self.supports_batching = inner.supports_batching
+        self.max_rate = inner.max_rate
+        self.matcher = matcher
+        self.remaining = count
+        self.stop_event = stop_event
+        self.first_at = self.last_at = None
+
+    def send_many(self, events, target=None) -> int:
+        events = list(events)[:self.remaining]
+        now = time.perf_counter()
+        for code in events:
+            self.matcher.sent(code, now)
+        sent = self.inner.send_many(events, target)
+        if self.first_at is None:
+            self.first_at = now
+        self.last_at = now
+        self.remaining -= len(events)
+        if self.remaining <= 0:
+            self.stop_event.set()
+        return sent
+
+
+def _send(backend, codes, rate, clock, target=None):
+    """Run the repeat loop, one tag key per round at the given rate, until the tagging backend stops it."""
+    cycle = itertools.cycle(codes)
+    run_repeat_loop(None, lambda: (next(cycle),), 1.0 / rate, backend.stop_event,
+                    target_exe_getter=(lambda: "probe") if target is not None else None,
+                    options=LoopOptions(backend=backend, clock=clock,
+                                        window_finder=(lambda exe, all_windows: [target]) if target is not None else None))
+
+
+def _probe_listener(backend, codes, rate, clock):
+    """Focused-window backends: a global pynput listener observes the injected keys."""
+    from pynput import keyboard
+    from layout import code_for_pynput
+
+    matcher = backend.matcher
+    listener = keyboard.Listener(on_press=lambda key: matcher.observed(code_for_pynput(key), time.perf_counter()))
+    listener.start()
+    listener.wait()
+    try:
+        _send(backend, codes, rate, clock)
+        time.sleep(SETTLE_SEC)
+    finally:
+        listener.stop()
+
+
+def _probe_window(backend, codes, rate, clock):
+    """Window-only backends: a focused Tk probe window is the target and observes its own KeyPress events."""
+    import tkinter as tk
+
+    matcher = backend.matcher
+    root = tk.Tk()
+    root.title("latency probe")
+    root.geometry("240x60")
+    tk.Label(root, text="latency probe: do not type").pack(expand=True)
+    root.bind("<KeyPress>", lambda e: matcher.observed(code_for_name(e.keysym, register=False), time.perf_counter()))
+    root.update()
+    root.focus_force()
+    root.update()
+    sender = threading.Thread(target=_send, args=(backend, codes, rate, clock, root.winfo_id()), daemon=True)
+    done = []
+
+    def poll():
+        if sender.is_alive():
+            root.after(20, poll)
+        elif not done:
+            done.append(True)
+            root.after(int(SETTLE_SEC * 1000), root.quit)
+
+    sender.start()
+    root.after(20, poll)
+    root.mainloop()
+    root.destroy()
+
+
+def probe(backend_name: str, rate: float, count: int, clock_name: str, codes) -> dict:
+    """Send count tag keys through a backend at rate keys/s and return the delivery statistics."""
+    inner = create_backend(backend_name)
+    if inner is None:
+        raise ValueError("pick a concrete backend, not auto")
+    matcher = _Matcher(codes)
+    backend = _TaggingBackend(inner, matcher, count, threading.Event())
+    if inner.supports_foreground:
+        observer = "listener"
+        _probe_listener(backend, codes, rate, CLOCKS[clock_name]())
+    else:
+        observer = "window"
+        _probe_window(backend, codes, rate, CLOCKS[clock_name]())
+    matcher.finish()
+    sent = count - max(0, backend.remaining)
+    span = (backend.last_at - backend.first_at) if backend.first_at is not None else 0.0
+    ms = [lat * 1000 for lat in matcher.latencies]
+    result = {"backend": backend_name, "observer": observer, "clock": clock_name, "rate": rate,
+              "achieved_rate": round((sent - 1) / span, 1) if span > 0 else None,
+              "sent": sent, "delivered": len(ms), "dropped": matcher.dropped,
+              "drop_rate": round(matcher.dropped / sent, 4) if sent else None, "unmatched": matcher.unmatched}
+    for name, q in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99), ("max_ms", 1.0)):
+        result[name] = round(_percentile(ms, q), 3) if ms else None
+    return result
+
+
+def _fmt(value, width, prec=3):
+    return f"{value:{width}.{prec}f}" if value is not None else f"{'-':>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure key delivery latency and drops per backend, rate and clock.")
+    parser.add_argument("--backends", default="pynput", help="comma-separated backend names (pynput, x11, win32, null)")
+    parser.add_argument("--rates", default=DEFAULT_RATES, help="comma-separated keys/s")
+    parser.add_argument("--clocks", default="event", help="comma-separated engine clocks: " + ", ".join(CLOCKS))
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="keys sent per run")
+    parser.add_argument("--keys", default=DEFAULT_TAG_KEYS, help="comma-separated tag key names")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("no $DISPLAY: run under xvfb-run -a (the probe needs a display to deliver and observe keys)")
+        sys.exit(2)
+    codes = [code_for_name(name.strip()) for name in args.keys.split(",") if name.strip()]
+    if not args.json:
+        print(f"tag keys {[KEY_NAMES[c] for c in codes]}, {args.count} keys per run, drop after {SETTLE_SEC}s")
+        print(f"{'backend':8s} {'observer':8s} {'clock':7s} {'rate':>6s} {'achieved':>9s} {'sent':>5s} {'recv':>5s} "
+              f"{'drop%':>6s} {'unm':>4s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for backend_name in args.backends.split(","):
+        for clock_name in args.clocks.split(","):
+            for rate in args.rates.split(","):
+                try:
+                    r = probe(backend_name.strip(), float(rate), args.count, clock_name.strip(), codes)
+                except Exception as e:
+                    print(f"{backend_name} {clock_name} {rate}/s: {type(e).__name__}: {e}")
+                    continue
+                if args.json:
+                    print(json.dumps(r))
+                    continue
+                drop = r["drop_rate"] * 100 if r["drop_rate"] is not None else None
+                print(f"{r['backend']:8s} {r['observer']:8s} {r['clock']:7s} {r['rate']:6.0f} {_fmt(r['achieved_rate'], 9, 1)} "
+                      f"{r['sent']:5d} {r['delivered']:5d} {_fmt(drop, 6, 1)} {r['unmatched']:4d} "
+                      f"{_fmt(r['p50_ms'], 8)} {_fmt(r['p90_ms'], 8)} {_fmt(r['p99_ms'], 8)} {_fmt(r['max_ms'], 8)}")
+
+
+if __name__ == "__main__":
+    main()
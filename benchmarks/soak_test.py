@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Soak test: thousands of start/stop, turbo hold, hotkey-capture, config save/load and control-API
+cycles against the null output backend and a fake listener/Tk root, sampling RSS, tracemalloc,
+live threads and open file descriptors. After a warm-up, exits 1 if any of them grows beyond its
+bound, printing the top tracemalloc allocators that grew.
+Run from the repo root: python benchmarks/soak_test.py [cycles]
+"""
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_io import apply_config_to_app, load_config, save_config
+from control_server import ControlClient, ControlServer
+from engine_supervisor import EngineSupervisor
+from hotkey_manager import HotkeyManager
+from keycodes import code_for_name
+from layout import code_to_press
+from output_backends import NullBackend
+from repeater_engine import LoopOptions
+from turbo_mode import TurboTrigger
+
+CYCLES = 3000
+SAMPLE_EVERY = 250
+# Growth allowed between the end of warm-up and the end of the run.
+RSS_GROWTH_KB = 4096
+TRACED_GROWTH_KB = 512
+THREAD_GROWTH = 2
+FD_GROWTH = 2
+
+
+class _FakeListener:
+    """Stands in for pynput's keyboard.Listener; the harness calls on_press/on_release itself."""
+
+    def __init__(self, on_press=None, on_release=None):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class _FakeRoot:
+    """Tk root stand-in: after() callbacks run when the harness pumps them."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, func):
+        self.pending.append(func)
+
+    def winfo_exists(self):
+        return True
+
+    def pump(self):
+        pending, self.pending = self.pending, []
+        for func in pending:
+            func()
+
+
+class _Var:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class _Widget:
+    def config(self, **kw):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _fake_app():
+    """The attributes config_io reads and writes on KeyboardRepeaterApp, without Tk."""
+    app = type("FakeApp", (), {})()
+    app.selected_keys = set()
+    app.interval_var, app.unit_var, app.unit_combo = _Var("0.5"), _Var("Seconds"), _Widget()
+    app.start_hotkey, app.stop_hotkey, app.turbo_key = code_for_name("f9"), code_for_name("f10"), code_for_name("f8")
+    app.start_hotkey_var, app.stop_hotkey_var = _Var("F9"), _Var("F10")
+    app.start_hotkey_btn, app.stop_hotkey_btn, app.turbo_key_btn = _Widget(), _Widget(), _Widget()
+    app.target_exe_var, app.target_all_windows_var = _Var("game"), _Var(True)
+    app.turbo_interval_var, app.backend_var = _Var("30"), _Var("null")
+    app.text_mode_var, app.text_var, app.text_cps_var = _Var(False), _Var("hello"), _Var("0")
+    app.keyboard_layout_var = _Var("compact")
+    app._set_keyboard_layout = app.keyboard_layout_var.set
+    app._update_hotkey_button_states = lambda: None
+    app._get_interval_seconds = lambda: float(app.interval_var.get())
+    app._get_turbo_interval_seconds = lambda: float(app.turbo_interval_var.get()) / 1000.0
+    app._get_text_cps = lambda: float(app.text_cps_var.get()) or None
+    return app
+
+
+def _rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return None
+
+
+def _open_fds():
+    for folder in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(folder))
+        except OSError:
+            pass
+    return None
+
+
+def _sample(cycle):
+    gc.collect()
+    time.sleep(0.05)  # let stopped listener/pool threads finish exiting
+    return {"cycle": cycle, "rss_kb": _rss_kb(), "traced_kb": tracemalloc.get_traced_memory()[0] // 1024,
+            "threads": threading.active_count(), "fds": _open_fds()}
+
+
+def _wait_until(cond, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not cond():
+        if time.perf_counter() > deadline:
+            raise RuntimeError("soak cycle timed out")
+        time.sleep(0.0002)
+
+
+class _Soak:
+    def __init__(self, workdir):
+        self.backend = NullBackend()
+        self.keys = [code_for_name(c) for c in "abc"]
+        self.supervisor = EngineSupervisor()
+        self.supervisor.prewarm()
+        self.turbo = TurboTrigger(self._turbo_hold, lambda at: self.supervisor.stop(at), debounce_sec=0.002)
+        self.root = _FakeRoot()
+        self.hotkeys = HotkeyManager(self.root, lambda at: None, lambda at: None, turbo=self.turbo,
+                                     listener_factory=_FakeListener)
+        self.hotkeys.set_turbo_key(code_for_name("f8"))
+        self.hotkeys.start_listener()
+        self.captured = []
+        self.app = _fake_app()
+        self.config_path = os.path.join(workdir, "soak.json")
+        address = os.path.join(workdir, "control.sock") if hasattr(os, "fork") else ("127.0.0.1", 0)
+        self.token_path = os.path.join(workdir, "control.token")
+        self.server = ControlServer({"status": lambda req: {"state": self.supervisor.snapshot()["state"]}}, address,
+                                    self.token_path)
+        self.server.start()
+
+    def _start(self, interval_sec, requested_at=None, windows=()):
+        self.supervisor.start(None, lambda: self.keys, interval_sec, requested_at=requested_at,
+                              target_exe_getter=lambda: "game" if windows else "",
+                              target_all_windows_getter=lambda: True,
+                              options=LoopOptions(backend=self.backend,
+                                                  window_finder=lambda exe, all_windows: list(windows)))
+
+    def _turbo_hold(self, at):
+        self._start(0.001, at)
+
+    def _job_done(self):
+        return not self.supervisor.engine.metrics["active_loops"]
+
+    def cycle(self, n):
+        # Start/stop, alternating foreground and several target windows (send pool).
+        sent = self.backend.keys
+        self._start(0.001, windows=(0x10, 0x20, 0x30) if n % 2 else ())
+        _wait_until(lambda: self.backend.keys > sent)
+        self.supervisor.stop()
+        _wait_until(self._job_done)
+        # Turbo hold through the listener callbacks, with some OS autorepeat.
+        listener, key = self.hotkeys.listener, code_to_press(code_for_name("f8"))
+        sent = self.backend.keys
+        listener.on_press(key)
+        listener.on_press(key)
+        _wait_until(lambda: self.backend.keys > sent)
+        listener.on_release(key)
+        _wait_until(lambda: not self.turbo.held and self._job_done())
+        # Hotkey capture: new capture listener, one key, back to the global listener.
+        self.hotkeys.capture("start", lambda which, code: self.captured.append(code))
+        self.hotkeys.capture_listener.on_press(code_to_press(code_for_name("f9")))
+        self.root.pump()
+        if self.captured.pop() != code_for_name("f9") or self.hotkeys.listener is None:
+            raise RuntimeError("hotkey capture did not complete")
+        # Config save/load/apply.
+        save_config(self.config_path, self.app)
+        apply_config_to_app(load_config(self.config_path), self.app)
+        # One control connection per cycle, like a relaunch handoff.
+        with ControlClient(self.server.address, 2.0, self.token_path) as client:
+            if not client.request("status")["ok"]:
+                raise RuntimeError("control request failed")
+
+    def close(self):
+        self.server.stop()
+        self.hotkeys.stop_listener()
+        self.supervisor.stop()
+        self.supervisor.engine.shutdown()
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else CYCLES
+    warmup = max(SAMPLE_EVERY, cycles // 10)
+    tracemalloc.start(10)
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        soak = _Soak(workdir)
+        t0 = time.perf_counter()
+        baseline_snapshot = None
+        for n in range(1, cycles + 1):
+            soak.cycle(n)
+            if n == warmup:
+                samples.append(_sample(n))
+                baseline_snapshot = tracemalloc.take_snapshot()
+            elif n % SAMPLE_EVERY == 0 or n == cycles:
+                samples.append(_sample(n))
+                print("cycle {cycle:6d}  rss={rss_kb} kB  traced={traced_kb} kB  threads={threads}  fds={fds}".format(**samples[-1]))
+        elapsed = time.perf_counter() - t0
+        final_snapshot = tracemalloc.take_snapshot()
+        soak.close()
+
+    base, last = samples[0], samples[-1]
+    bounds = (("rss_kb", RSS_GROWTH_KB), ("traced_kb", TRACED_GROWTH_KB), ("threads", THREAD_GROWTH), ("fds", FD_GROWTH))
+    failures = [f"{key} grew {last[key] - base[key]} (bound {bound})"
+                for key, bound in bounds if base[key] is not None and last[key] - base[key] > bound]
+    print(f"{cycles} cycles in {elapsed:.1f} s; growth after warm-up (cycle {base['cycle']}): "
+          + ", ".join(f"{key}={last[key] - base[key]:+d}" for key, _ in bounds if base[key] is not None))
+    if baseline_snapshot is not None:
+        print("top allocators by growth:")
+        for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+            print("  ", stat)
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
-"""Save/load config to/from JSON. App object provides selected_keys, interval_var, unit_var, hotkeys, key_buttons."""
+"""Save/load config to/from JSON. App object provides selected_keys, interval_var, unit_var, hotkeys, keyboard.
+Keys are key codes inside the app and key names in the JSON file; translation happens only here."""
 import json
 import os
 import sys
 from datetime import datetime
 
+from keycodes import code_for_name, codes_to_names, key_name, names_to_codes
+from trace_events import get_tracer
+
 
 def get_default_config_path() -> str:
     """Return path to the 'last session' config file (used by Confirm button and on startup)."""
@@ -22,6 +26,18 @@ def get_log_path() -> str:
     return os.path.join(folder, "repeater_log.txt")
 
 
+def get_profiles_dir() -> str:
+    """Return the folder holding named profiles (profile 'name' is stored as <folder>/name.json)."""
+    return os.path.join(os.path.dirname(get_default_config_path()), "profiles")
+
+
+def resolve_profile_path(profile: str) -> str:
+    """Return the config path for a profile given by name (see get_profiles_dir) or by file path."""
+    if os.sep in profile or (os.altsep and os.altsep in profile) or profile.lower().endswith(".json"):
+        return os.path.abspath(os.path.expanduser(profile))
+    return os.path.join(get_profiles_dir(), profile + ".json")
+
+
 def clear_log(path: str) -> None:
     """Clear the log file (truncate). Creates folder if needed. Call when starting a new run."""
     folder = os.path.dirname(path)
@@ -54,6 +70,14 @@ DEFAULT_CONFIG = {
     "start_hotkey": "f9",
     "stop_hotkey": "f10",
     "target_exe": "",
+    "target_all_windows": False,
+    "turbo_key": "",
+    "turbo_interval_ms": 30,
+    "backend": "auto",
+    "text_mode": False,
+    "text": "",
+    "text_cps": 0,
+    "keyboard_layout": "compact",
 }
 
 
@@ -63,12 +87,20 @@ def save_config(path: str, app) -> None:
     unit = app.unit_var.get()
     interval_num = interval_sec / 60.0 if unit == "Minutes" else interval_sec
     data = {
-        "selected_keys": list(app.selected_keys),
+        "selected_keys": codes_to_names(sorted(app.selected_keys)),
         "interval": interval_num,
         "unit": unit,
-        "start_hotkey": app.start_hotkey,
-        "stop_hotkey": app.stop_hotkey,
+        "start_hotkey": key_name(app.start_hotkey),
+        "stop_hotkey": key_name(app.stop_hotkey),
         "target_exe": getattr(app, "target_exe_var", None) and app.target_exe_var.get().strip() or "",
+        "target_all_windows": bool(getattr(app, "target_all_windows_var", None) and app.target_all_windows_var.get()),
+        "turbo_key": key_name(app.turbo_key) if app.turbo_key is not None else "",
+        "turbo_interval_ms": app._get_turbo_interval_seconds() * 1000.0,
+        "backend": app.backend_var.get() or "auto",
+        "text_mode": bool(app.text_mode_var.get()),
+        "text": app.text_var.get(),
+        "text_cps": app._get_text_cps() or 0,
+        "keyboard_layout": app.keyboard_layout_var.get(),
     }
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
@@ -76,30 +108,47 @@ def save_config(path: str, app) -> None:
 
 def load_config(path: str) -> dict:
     """Load config dict from JSON file."""
+    tracer = get_tracer()
+    t0 = tracer.now() if tracer else 0
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        data = json.load(f)
+    if tracer:
+        tracer.complete("load_config", "config", t0, {"path": path})
+    return data
 
 
 def apply_config_to_app(data: dict, app) -> None:
-    """Apply loaded config dict to app (selection, interval, unit, hotkeys)."""
+    """Apply loaded config dict to app (selection, interval, unit, hotkeys, turbo, output backend, text mode, keyboard layout)."""
+    tracer = get_tracer()
+    t0 = tracer.now() if tracer else 0
     app.selected_keys.clear()
-    for key_id, btn_list in app.key_buttons.items():
-        for btn in btn_list:
-            btn.config(bg="SystemButtonFace", activebackground="SystemButtonFace")
-    for key_id in data.get("selected_keys", []):
-        app.selected_keys.add(key_id)
-        for btn in app.key_buttons.get(key_id, []):
-            btn.config(bg="#87CEEB", activebackground="#6BB3DD")
+    app.selected_keys.update(names_to_codes(data.get("selected_keys", [])))
     app.interval_var.set(str(data.get("interval", 1)))
     raw_unit = data.get("unit", "Seconds")
     unit = "Minutes" if raw_unit in ("分鐘", "Minutes") else "Seconds"
     app.unit_var.set(unit)
     app.unit_combo.set(unit)
-    app.start_hotkey = data.get("start_hotkey", "f9")
-    app.stop_hotkey = data.get("stop_hotkey", "f10")
-    app.start_hotkey_var.set(app.start_hotkey.upper())
-    app.stop_hotkey_var.set(app.stop_hotkey.upper())
-    app.start_hotkey_btn.config(text=app.start_hotkey.upper())
-    app.stop_hotkey_btn.config(text=app.stop_hotkey.upper())
+    app.start_hotkey = code_for_name(data.get("start_hotkey") or "f9")
+    app.stop_hotkey = code_for_name(data.get("stop_hotkey") or "f10")
+    app.start_hotkey_var.set(key_name(app.start_hotkey).upper())
+    app.stop_hotkey_var.set(key_name(app.stop_hotkey).upper())
+    app.start_hotkey_btn.config(text=key_name(app.start_hotkey).upper())
+    app.stop_hotkey_btn.config(text=key_name(app.stop_hotkey).upper())
     if getattr(app, "target_exe_var", None) is not None:
-        app.target_exe_var.set(data.get("target_exe", "") or "")
\ No newline at end of file
+        app.target_exe_var.set(data.get("target_exe", "") or "")
+    if getattr(app, "target_all_windows_var", None) is not None:
+        app.target_all_windows_var.set(bool(data.get("target_all_windows", False)))
+    turbo_name = data.get("turbo_key") or ""
+    app.turbo_key = code_for_name(turbo_name) if turbo_name else None
+    if app.turbo_key in (app.start_hotkey, app.stop_hotkey):
+        app.turbo_key = None  # a trigger on a hotkey would shadow it (hand-edited config)
+    app.turbo_key_btn.config(text=key_name(app.turbo_key).upper() if app.turbo_key is not None else "None")
+    app.turbo_interval_var.set(str(data.get("turbo_interval_ms", 30)))
+    app.backend_var.set(data.get("backend") or "auto")
+    app.text_mode_var.set(bool(data.get("text_mode", False)))
+    app.text_var.set(data.get("text", "") or "")
+    app.text_cps_var.set(str(data.get("text_cps", 0)))
+    app._set_keyboard_layout(data.get("keyboard_layout") or "compact")
+    app._update_hotkey_button_states()
+    if tracer:
+        tracer.complete("apply_config", "config", t0)
\ No newline at end of file
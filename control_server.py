@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Local control API: line-delimited JSON over a Unix domain socket (localhost TCP on Windows).
+
+Request:  {"cmd": "start"}            one JSON object per line; optional "id" is echoed back
+Response: {"ok": true, ...}           or {"ok": false, "error": "..."}
+Commands are whatever handlers the server is given (the app registers ping, start, stop, status,
+load_profile). Each connection is served on its own daemon thread, never on the Tk thread.
+
+Every connection starts with a handshake proving both ends know the instance's random token, which
+the server writes to a user-only file in the config folder on start (the Windows TCP port is
+reachable by every local user and by web pages; the token never goes over the socket):
+    {"cmd": "hello", "nonce": cn}           -> {"ok": true, "nonce": sn, "proof": HMAC(token, "server:" + cn)}
+    {"cmd": "auth", "proof": HMAC(token, "client:" + sn)} -> {"ok": true}
+Anything else before that, a failed proof, or a line that is not a JSON object gets an error reply
+and the connection is closed. ControlClient does the handshake itself.
+"""
+import hashlib
+import hmac
+import json
+import os
+import socket
+import sys
+import threading
+
+from config_io import get_default_config_path
+
+_USE_UNIX_SOCKET = hasattr(socket, "AF_UNIX") and sys.platform != "win32"
+
+
+def get_control_address(token_path: str | None = None):
+    """
+    Return the socket path (Unix) or ("127.0.0.1", port) of this user's control server. On Windows
+    the server binds any free port and publishes it in the user's token file, so each user only ever
+    finds their own instance; port 0 means none is running.
+    """
+    if _USE_UNIX_SOCKET:
+        return os.path.join(os.path.dirname(get_default_config_path()), "control.sock")
+    return ("127.0.0.1", _read_token_file(token_path)[1])
+
+
+def get_control_token_path() -> str:
+    return os.path.join(os.path.dirname(get_default_config_path()), "control.token")
+
+
+def _proof(token: str, role: str, nonce) -> str:
+    return hmac.new(token.encode("ascii"), f"{role}:{nonce}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _write_token(path: str, token: str, port: int = 0) -> None:
+    """Write token (and TCP port) readable by the current user only (the config folder is per user on Windows)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{token}\n{port}\n")
+    os.replace(tmp, path)
+
+
+def _read_token_file(path: str | None = None) -> tuple[str | None, int]:
+    """Return (token, port) from the token file, (None, 0) if there is none."""
+    try:
+        with open(path or get_control_token_path()) as f:
+            lines = f.read().split()
+    except OSError:
+        return None, 0
+    try:
+        port = int(lines[1]) if len(lines) > 1 else 0
+    except ValueError:
+        port = 0
+    return (lines[0] if lines else None), port
+
+
+def read_control_token(path: str | None = None) -> str | None:
+    return _read_token_file(path)[0]
+
+
+def _decode_request(line: bytes):
+    """Return (request dict, None) or (None, error message)."""
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+    except ValueError as e:
+        return None, f"bad request: {e}"
+    return request, None
+
+
+def _new_socket(address):
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return s
+
+
+class ControlServer:
+    """
+    Serve handlers: dict of cmd -> callable(request_dict) returning a dict merged into the reply.
+    token_path (default: control.token in the config folder) is where start() writes the new token.
+    """
+
+    def __init__(self, handlers: dict, address=None, token_path: str | None = None):
+        self.handlers = dict(handlers)
+        self.address = address or (get_control_address() if _USE_UNIX_SOCKET else ("127.0.0.1", 0))
+        self.token_path = token_path or get_control_token_path()
+        self.token = None
+        self._sock = None
+        self._thread = None
+        self._closing = False
+
+    def start(self) -> None:
+        """Bind and start accepting. Raises OSError if another live server already owns the address."""
+        sock = _new_socket(self.address)
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(self.address), exist_ok=True)
+            if os.path.exists(self.address):
+                if _address_alive(self.address):
+                    sock.close()
+                    raise OSError(f"control socket in use: {self.address}")
+                os.unlink(self.address)  # stale socket from a crashed instance
+        else:
+            if sys.platform == "win32":
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        try:
+            sock.bind(self.address)
+            sock.listen(8)
+        except OSError:
+            sock.close()
+            raise
+        if not isinstance(self.address, str):
+            self.address = sock.getsockname()[:2]  # the actual port when bound to port 0
+        self.token = os.urandom(32).hex()
+        try:
+            _write_token(self.token_path, self.token, 0 if isinstance(self.address, str) else self.address[1])
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._closing = False
+        self._thread = threading.Thread(target=self._accept_loop, name="control-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop accepting and wait for the accept thread to exit (open connections finish on their own)."""
+        self._closing = True
+        sock, self._sock = self._sock, None
+        thread, self._thread = self._thread, None
+        if sock is not None:
+            # close() alone does not wake a thread blocked in accept() on Linux; shutdown() does.
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+            if isinstance(self.address, str):
+                try:
+                    os.unlink(self.address)
+                except OSError:
+                    pass
+            if read_control_token(self.token_path) == self.token:  # not if a newer instance replaced it
+                try:
+                    os.unlink(self.token_path)
+                except OSError:
+                    pass
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _accept_loop(self):
+        sock = self._sock
+        while not self._closing:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                break
+            if self._closing:
+                conn.close()
+                break
+            threading.Thread(target=self._serve_connection, args=(conn,), name="control-conn", daemon=True).start()
+
+    def _serve_connection(self, conn):
+        if not isinstance(self.address, str):
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        authenticated = False
+        server_nonce = None
+        try:
+            with conn, conn.makefile("rb") as rfile:
+                for line in rfile:
+                    if not line.strip():
+                        continue
+                    request, error = _decode_request(line)
+                    if error is not None:
+                        reply = {"ok": False, "error": error}
+                    elif authenticated:
+                        reply = self.dispatch(request)
+                    elif request.get("cmd") == "hello" and server_nonce is None and request.get("nonce"):
+                        server_nonce = os.urandom(16).hex()
+                        reply = {"ok": True, "nonce": server_nonce, "proof": _proof(self.token, "server", request["nonce"])}
+                    elif (request.get("cmd") == "auth" and server_nonce is not None
+                          and hmac.compare_digest(str(request.get("proof", "")), _proof(self.token, "client", server_nonce))):
+                        authenticated = True
+                        reply = {"ok": True}
+                    else:
+                        reply = {"ok": False, "error": "unauthorized"}
+                    conn.sendall(json.dumps(reply, separators=(",", ":")).encode("utf-8") + b"\n")
+                    if not reply["ok"] and not authenticated:
+                        break  # e.g. HTTP headers from a browser: never read on to a JSON body
+                    if error is not None:
+                        break
+        except OSError:
+            pass
+
+    def handle_line(self, line: bytes) -> dict:
+        """Decode one request line and dispatch it (no handshake). Never raises; errors become {"ok": false}."""
+        request, error = _decode_request(line)
+        if error is not None:
+            return {"ok": False, "error": error}
+        return self.dispatch(request)
+
+    def dispatch(self, request: dict) -> dict:
+        """Run the handler for an authenticated request."""
+        reply = {"ok": True}
+        handler = self.handlers.get(request.get("cmd"))
+        if handler is None:
+            reply = {"ok": False, "error": f"unknown command: {request.get('cmd')!r}"}
+        else:
+            try:
+                reply.update(handler(request) or {})
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+
+def _address_alive(address) -> bool:
+    try:
+        with _new_socket(address) as s:
+            s.settimeout(0.2)
+            s.connect(address)
+        return True
+    except OSError:
+        return False
+
+
+class ControlClient:
+    """
+    Persistent client connection; request() sends one command and waits for its reply.
+    Connecting does the handshake with the token from token_path (default: the config folder) and
+    raises PermissionError if there is no token or the server cannot prove it knows it (not our instance).
+    """
+
+    def __init__(self, address=None, timeout: float = 2.0, token_path: str | None = None):
+        token = read_control_token(token_path)
+        self.address = address or get_control_address(token_path)
+        if not isinstance(self.address, str) and not self.address[1]:
+            raise ConnectionRefusedError("no running instance (no control port published)")
+        self._sock = _new_socket(self.address)
+        self._rfile = None
+        try:
+            self._sock.settimeout(timeout)
+            self._sock.connect(self.address)
+            self._rfile = self._sock.makefile("rb")
+            if token is None:
+                raise PermissionError("no control token (is the app running as this user?)")
+            nonce = os.urandom(16).hex()
+            reply = self.request("hello", nonce=nonce)
+            if not reply.get("ok") or not hmac.compare_digest(str(reply.get("proof", "")), _proof(token, "server", nonce)):
+                raise PermissionError("control server did not prove the instance token")
+            if not self.request("auth", proof=_proof(token, "client", reply.get("nonce"))).get("ok"):
+                raise PermissionError("control server rejected the instance token")
+        except BaseException:
+            self.close()
+            raise
+
+    def request(self, cmd: str, **params) -> dict:
+        params["cmd"] = cmd
+        self._sock.sendall(json.dumps(params, separators=(",", ":")).encode("utf-8") + b"\n")
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("control server closed the connection")
+        reply = json.loads(line)
+        if not isinstance(reply, dict):
+            raise ValueError("control reply is not a JSON object")
+        return reply
+
+    def close(self) -> None:
+        try:
+            if self._rfile is not None:
+                self._rfile.close()
+        finally:
+            self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def send_command(cmd: str, address=None, timeout: float = 2.0, token_path: str | None = None, **params) -> dict:
+    """One-shot helper: connect, send one command, return the reply. Raises OSError if no server (or not ours)."""
+    with ControlClient(address, timeout, token_path) as client:
+        return client.request(cmd, **params)
+
+
+if __name__ == "__main__":
+    # Usage: python control_server.py <cmd> ['{"param": "value"}']
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    extra = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
+    try:
+        print(json.dumps(send_command(sys.argv[1], **extra)))
+    except OSError as e:
+        print(f"No running instance: {e}", file=sys.stderr)
+        sys.exit(1)
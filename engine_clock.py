@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Clocks for the repeat loop: the real clock, and a virtual clock that fast-forwards for simulation."""
+import heapq
+import itertools
+import time
+
+
+class RealClock:
+    """Wall-clock time; wait() blocks on the stop event."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def wait(self, stop_event, timeout: float) -> bool:
+        """Wait up to timeout seconds or until stop_event is set. Returns True if it was set."""
+        return stop_event.wait(timeout=timeout)
+
+
+REAL_CLOCK = RealClock()
+
+
+class PreciseClock(RealClock):
+    """
+    Wall-clock time; wait() blocks on the stop event until spin_sec before the deadline, then
+    busy-waits, so short intervals are not stretched by OS timer granularity (1-15 ms).
+    Costs CPU for spin_sec per wait; meant for high rates and latency measurements.
+    """
+
+    def __init__(self, spin_sec: float = 0.002):
+        self.spin_sec = spin_sec
+
+    def wait(self, stop_event, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        if timeout > self.spin_sec and stop_event.wait(timeout=timeout - self.spin_sec):
+            return True
+        while time.monotonic() < deadline:
+            if stop_event.is_set():
+                return True
+        return stop_event.is_set()
+
+
+class VirtualClock:
+    """
+    Simulated time starting at 0.0. wait() returns immediately after advancing the clock, running
+    any callbacks scheduled with call_at()/call_later() that fall inside the waited span (in time
+    order, at their scheduled time). A callback may set the stop event to end the wait early.
+    Single-threaded: the loop under test must run in the thread that drives the clock.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+        self._timers = []
+        self._seq = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    def call_at(self, when: float, callback) -> None:
+        """Run callback() when virtual time reaches when (immediately on the next wait if already past)."""
+        heapq.heappush(self._timers, (float(when), next(self._seq), callback))
+
+    def call_later(self, delay: float, callback) -> None:
+        self.call_at(self._now + delay, callback)
+
+    def advance(self, seconds: float) -> None:
+        """Move time forward, running due callbacks (no stop event involved)."""
+        self._run_until(self._now + seconds, None)
+
+    def wait(self, stop_event, timeout: float) -> bool:
+        if stop_event.is_set():
+            return True
+        return self._run_until(self._now + max(0.0, timeout), stop_event)
+
+    def _run_until(self, deadline: float, stop_event) -> bool:
+        while self._timers and self._timers[0][0] <= deadline:
+            when, _, callback = heapq.heappop(self._timers)
+            self._now = max(self._now, when)
+            callback()
+            if stop_event is not None and stop_event.is_set():
+                return True
+        self._now = max(self._now, deadline)
+        return False
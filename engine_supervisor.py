@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""Watchdog for the repeat engine: heartbeat-based stall detection, overrun counting and automatic restart."""
+import threading
+import time
+from collections import deque
+
+from engine_clock import REAL_CLOCK
+from engine_thread import RepeaterEngine
+from repeater_engine import LoopOptions
+
+DEFAULT_STALL_THRESHOLD_SEC = 2.0
+# A loop that dies more than MAX_RESTARTS times within RESTART_WINDOW_SEC is given up on ("failed").
+MAX_RESTARTS = 5
+RESTART_WINDOW_SEC = 60.0
+
+# Engine states reported to the UI / control API.
+STOPPED, RUNNING, PAUSED, STALLED, RESTARTING, FAILED = "stopped", "running", "paused", "stalled", "restarting", "failed"
+
+
+class EngineSupervisor:
+    """
+    Drives a RepeaterEngine (one persistent engine thread) and watches the heartbeat its loop
+    publishes in the stats dict, from one persistent monitor thread.
+    - A loop whose heartbeat is older than stall_threshold_sec while sending (or than interval +
+      stall_threshold_sec while waiting) is reported STALLED; when it moves again the stall
+      duration is recorded.
+    - A job whose loop ends while it was not stopped (uncaught error) is restarted with the same
+      plan, resuming on its previous cadence. If the engine thread itself is gone it is recreated.
+    Every method may be called from any thread. on_state_change(state) is called from the calling,
+    engine or monitor thread whenever the state changes.
+    """
+
+    def __init__(self, engine: RepeaterEngine | None = None, on_state_change=None, log_func=None,
+                 stall_threshold_sec: float = DEFAULT_STALL_THRESHOLD_SEC, clock=None):
+        self.engine = engine or RepeaterEngine()
+        self.engine.on_job_end = self._on_job_end
+        self.on_state_change = on_state_change
+        self.log_func = log_func
+        self.stall_threshold_sec = stall_threshold_sec
+        self.clock = clock or REAL_CLOCK
+        self.state = STOPPED
+        self.metrics = self._new_metrics()
+        self._plan = None
+        self._active = False
+        self._wake = threading.Event()
+        self._restart_times = deque(maxlen=MAX_RESTARTS + 1)
+        self._monitor = None
+
+    @staticmethod
+    def _new_metrics():
+        return {"state": STOPPED, "restarts": 0, "stalls": 0, "max_stall_sec": 0.0,
+                "stall_durations": deque(maxlen=100), "last_error": None}
+
+    @property
+    def stats(self) -> dict:
+        return self.engine.stats
+
+    def _log(self, msg):
+        if self.log_func:
+            try:
+                self.log_func(msg)
+            except Exception:
+                pass
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        self.metrics["state"] = state
+        if self.on_state_change:
+            try:
+                self.on_state_change(state)
+            except Exception:
+                pass
+
+    def prewarm(self) -> None:
+        """Start the engine and monitor threads ahead of the first start command."""
+        self.engine.ensure_started()
+        if self._monitor is None or not self._monitor.is_alive():
+            self._monitor = threading.Thread(target=self._monitor_loop, name="repeat-supervisor", daemon=True)
+            self._monitor.start()
+
+    def start(self, controller, selected_keys_getter, interval_sec: float, requested_at: float | None = None,
+              before_run=None, options: LoopOptions | None = None, **loop_kwargs) -> None:
+        """
+        Start a new job (replacing any current one). loop_kwargs (target/log getters) and options are
+        passed on to run_repeat_loop; rounds slower than stall_threshold_sec count as overruns.
+        """
+        options = (options or LoopOptions())._replace(overrun_sec=self.stall_threshold_sec)
+        self._plan = dict(loop_kwargs, controller=controller, selected_keys_getter=selected_keys_getter,
+                          interval_sec=interval_sec, options=options)
+        self.metrics = self._new_metrics()
+        self._restart_times.clear()
+        self._active = True
+        self._set_state(RUNNING)  # before queuing: a job that dies at once moves on to RESTARTING / FAILED
+        self.engine.start_job(self._plan, requested_at, before_run=before_run)
+        self.prewarm()
+        self._wake.set()
+
+    def stop(self, requested_at: float | None = None) -> None:
+        """Stop the current job; the loop exits at once (never blocks the caller)."""
+        self._active = False
+        self.engine.stop_job(requested_at)
+        self._set_state(STOPPED)
+
+    def pause(self, requested_at: float | None = None) -> None:
+        if not self._active:
+            return
+        self._active = False
+        self.engine.pause(requested_at)
+        self._set_state(PAUSED)
+
+    def resume(self, requested_at: float | None = None) -> None:
+        if self._active or self.state != PAUSED:
+            return
+        self._active = True
+        self._set_state(RUNNING)
+        self.engine.resume(requested_at)
+        self._wake.set()
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def snapshot(self) -> dict:
+        """JSON-friendly copy of the engine stats, engine metrics and supervisor metrics."""
+        metrics = dict(self.metrics)
+        metrics["stall_durations"] = list(metrics["stall_durations"])
+        engine_metrics = dict(self.engine.metrics)
+        engine_metrics["start_latencies_ms"] = list(engine_metrics["start_latencies_ms"])
+        stats = dict(self.engine.stats)
+        if stats.get("first_key_at") is not None and stats.get("requested_at") is not None:
+            stats["start_latency_ms"] = round((stats["first_key_at"] - stats["requested_at"]) * 1000, 3)
+        return {"state": self.state, "engine": stats, "engine_metrics": engine_metrics, "supervisor": metrics}
+
+    def _on_job_end(self, stop_event, stats):
+        """Engine thread: a job's loop returned. Restart it unless it was stopped on purpose."""
+        if stop_event.is_set() or not self._active or stop_event is not self.engine.job_stop_event:
+            return
+        self._restart(stats.get("last_error") or "loop ended")
+
+    def _restart(self, error: str):
+        self.metrics["last_error"] = error
+        self._restart_times.append(time.monotonic())
+        if len(self._restart_times) > MAX_RESTARTS and self._restart_times[-1] - self._restart_times[0] < RESTART_WINDOW_SEC:
+            self._log(f"engine died ({error}); too many restarts, giving up")
+            self._active = False
+            self.engine.stop_job()
+            self._set_state(FAILED)
+            return
+        self._set_state(RESTARTING)
+        self.metrics["restarts"] += 1
+        self.engine.ensure_started()
+        self.engine.resume()
+        self._log(f"engine died ({error}); restarted on its previous cadence")
+        self._set_state(RUNNING)
+
+    def _monitor_loop(self):
+        stall_started = None
+        while True:
+            if not self._active:
+                stall_started = None
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            interval = self._plan["interval_sec"]
+            self._wake.wait(max(0.05, min(1.0, interval / 2, self.stall_threshold_sec / 2)))
+            self._wake.clear()
+            if not self._active:
+                continue
+            if not self.engine.is_alive():
+                self._restart("engine thread died")
+                continue
+            now = self.clock.now()
+            stats = self.engine.stats
+            if stats.get("phase") in (None, "stopped", "error"):
+                continue  # job not picked up yet, or already over (restart handled by _on_job_end)
+            heartbeat = stats.get("heartbeat", now)
+            allowed = self.stall_threshold_sec + (interval if stats.get("phase") == "wait" else 0.0)
+            if now - heartbeat > allowed:
+                if stall_started is None:
+                    stall_started = heartbeat
+                    self.metrics["stalls"] += 1
+                    self._log(f"engine stalled: no heartbeat for {now - heartbeat:.2f}s (phase={stats.get('phase')})")
+                    self._set_state(STALLED)
+            elif stall_started is not None:
+                duration = max(0.0, heartbeat - stall_started)
+                self.metrics["stall_durations"].append(round(duration, 3))
+                self.metrics["max_stall_sec"] = max(self.metrics["max_stall_sec"], duration)
+                self._log(f"engine recovered after {duration:.2f}s stall")
+                stall_started = None
+                self._set_state(RUNNING)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+One long-lived, pre-started engine thread that runs repeat jobs on command.
+
+Start/stop/pause/resume can be called from any thread (hotkey listener, control API, Tk) and never
+wait for Tk. Every job runs run_repeat_loop on this one thread, so at most one loop is ever alive:
+a new start first stops the current job, whose wait wakes immediately.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+from engine_clock import REAL_CLOCK
+from repeater_engine import LoopOptions, run_repeat_loop
+
+
+class RepeaterEngine:
+    """
+    Command channel + engine thread. A job is a plan: the keyword arguments for run_repeat_loop
+    (without stop_event; the engine fills in the stats and first_delay of its options). Commands carry the time.perf_counter() at which they
+    were requested (e.g. the hotkey press); metrics record start latency (request -> first key sent)
+    and stop latency (request -> loop exited).
+    on_job_end(stop_event, stats), if set, is called on the engine thread after each job returns.
+    """
+
+    def __init__(self, on_job_end=None, log_func=None):
+        self.on_job_end = on_job_end
+        self.log_func = log_func
+        self.stats = {}
+        self.metrics = {"jobs": 0, "active_loops": 0, "max_active_loops": 0,
+                        "start_latency_ms": None, "stop_latency_ms": None,
+                        "start_latencies_ms": deque(maxlen=100)}
+        self._commands = queue.SimpleQueue()
+        self._job_stop = threading.Event()
+        self._job_stop.set()
+        self._plan = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        """Start (pre-warm) the engine thread if it is not running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="repeat-engine", daemon=True)
+                self._thread.start()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def job_stop_event(self) -> threading.Event:
+        """Stop event of the most recently submitted job (set when it is stopped)."""
+        return self._job_stop
+
+    def start_job(self, plan: dict, requested_at: float | None = None, first_delay: float = 0.0,
+                  fresh: bool = True, before_run=None) -> threading.Event:
+        """
+        Stop any current job and queue a new one. fresh=False keeps the stats counters (resume/restart).
+        before_run(), if given, runs on the engine thread right before the loop (e.g. clearing the log).
+        Returns the new job's stop event.
+        """
+        requested_at = requested_at or time.perf_counter()
+        stop_event = threading.Event()
+        with self._lock:
+            self._job_stop.set()
+            self._job_stop = stop_event
+            self._plan = plan
+        self._commands.put(("start", plan, stop_event, requested_at, first_delay, fresh, before_run))
+        self.ensure_started()
+        return stop_event
+
+    def stop_job(self, requested_at: float | None = None) -> None:
+        """Stop the current job; its loop wakes from the interval wait and exits at once."""
+        requested_at = requested_at or time.perf_counter()
+        self._job_stop.set()
+        self._commands.put(("stop", requested_at))
+
+    def pause(self, requested_at: float | None = None) -> None:
+        """Stop the current job but keep its plan and counters for resume()."""
+        self.stop_job(requested_at)
+
+    def resume(self, requested_at: float | None = None) -> threading.Event | None:
+        """Restart the last plan, keeping its counters and its cadence (next round one interval after the last)."""
+        plan = self._plan
+        if plan is None:
+            return None
+        first_delay = 0.0
+        last = self.stats.get("last_round_at")
+        if last is not None:
+            clock = (plan.get("options") or LoopOptions()).clock or REAL_CLOCK
+            first_delay = max(0.0, last + plan["interval_sec"] - clock.now())
+        return self.start_job(plan, requested_at, first_delay=first_delay, fresh=False)
+
+    def shutdown(self) -> None:
+        self._job_stop.set()
+        self._commands.put(("quit",))
+
+    def _log(self, msg):
+        if self.log_func:
+            try:
+                self.log_func(msg)
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            cmd = self._commands.get()
+            if cmd[0] == "quit":
+                break
+            if cmd[0] == "stop":
+                self.metrics["stop_latency_ms"] = round((time.perf_counter() - cmd[1]) * 1000, 3)
+                continue
+            _, plan, stop_event, requested_at, first_delay, fresh, before_run = cmd
+            if stop_event.is_set():
+                continue  # superseded or stopped before it began
+            try:
+                self._run_job(plan, stop_event, requested_at, first_delay, fresh, before_run)
+            except Exception as e:  # keep the engine thread alive whatever a job does
+                self._log(f"engine job error: {e}")
+
+    def _run_job(self, plan, stop_event, requested_at, first_delay, fresh, before_run):
+        stats = {} if fresh else self.stats
+        stats["first_key_at"] = None
+        stats["requested_at"] = requested_at
+        self.stats = stats
+        if before_run is not None:
+            before_run()
+        self.metrics["jobs"] += 1
+        self.metrics["active_loops"] += 1
+        self.metrics["max_active_loops"] = max(self.metrics["max_active_loops"], self.metrics["active_loops"])
+        try:
+            options = (plan.get("options") or LoopOptions())._replace(stats=stats, first_delay=first_delay)
+            run_repeat_loop(stop_event=stop_event, **dict(plan, options=options))
+        finally:
+            self.metrics["active_loops"] -= 1
+        first_key_at = stats.get("first_key_at")
+        if first_key_at is not None and first_delay == 0.0:
+            latency = round((first_key_at - requested_at) * 1000, 3)
+            self.metrics["start_latency_ms"] = latency
+            self.metrics["start_latencies_ms"].append(latency)
+            self._log(f"start latency: first key {latency} ms after the start command")
+        if self.on_job_end is not None:
+            self.on_job_end(stop_event, stats)
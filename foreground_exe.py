@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-"""Get the executable path of the current foreground window (for target-app filtering)."""
+"""Foreground window exe lookup and exe -> target window resolution (for target-app filtering)."""
 import os
 import sys
 
@@ -43,26 +43,57 @@ def _get_foreground_exe_win32() -> str | None:
 
 
 def normalize_exe_path(path: str) -> str:
-    """Normalize an executable path for comparison (case and separators)."""
+    """
+    Normalize an executable path for comparison (case and separators). Elsewhere symlinks are
+    resolved too: /proc/<pid>/exe is always the real file, while Browse may return a link to it
+    (e.g. /usr/bin/python3 -> python3.11).
+    """
     if not path:
         return ""
     p = os.path.normpath(path.strip())
     if sys.platform == "win32":
         p = os.path.normcase(p)
+    else:
+        p = os.path.realpath(p)
     return p
 
 
-def get_hwnd_for_exe(exe_path: str) -> int | None:
+def get_windows_for_exe(exe_path: str, first_only: bool = False) -> list[int]:
     """
-    Return a top-level window handle (hwnd) belonging to the process with the given exe path.
-    Returns None if not found or on non-Windows. Used to send keys to that window without focusing it.
+    Return all visible top-level windows belonging to processes with the given exe path.
+    Windows: hwnds via EnumWindows. Linux: X11 window ids via _NET_CLIENT_LIST / _NET_WM_PID.
+    Returns an empty list if nothing matches or on unsupported platforms.
     """
-    if sys.platform != "win32":
-        return None
-    return _get_hwnd_for_exe_win32(normalize_exe_path(exe_path))
+    target_norm = normalize_exe_path(exe_path)
+    if not target_norm:
+        return []
+    if sys.platform == "win32":
+        return _get_hwnds_for_exe_win32(target_norm, first_only=first_only)
+    if sys.platform.startswith("linux"):
+        return _get_windows_for_exe_x11(target_norm, first_only=first_only)
+    return []
+
+
+def split_target_exes(target_exe: str) -> list[str]:
+    """Split a target_exe setting into its exe paths (several paths are separated by os.pathsep)."""
+    return [p.strip() for p in (target_exe or "").split(os.pathsep) if p.strip()]
+
+
+def get_target_windows(target_exe: str, all_windows: bool = False) -> list[int]:
+    """
+    Resolve a target_exe setting (one path or an os.pathsep-separated list) to window ids.
+    With all_windows=False each exe contributes its first window; otherwise every matching window.
+    Duplicates are dropped, order is preserved.
+    """
+    result = []
+    for exe in split_target_exes(target_exe):
+        for win in get_windows_for_exe(exe, first_only=not all_windows):
+            if win not in result:
+                result.append(win)
+    return result
 
 
-def _get_hwnd_for_exe_win32(target_norm: str) -> int | None:
+def _get_hwnds_for_exe_win32(target_norm: str, first_only: bool = False) -> list[int]:
     from ctypes import byref, c_bool, create_unicode_buffer, windll, WINFUNCTYPE
     from ctypes.wintypes import DWORD, HANDLE, HWND, LPARAM
 
@@ -70,7 +101,8 @@ def _get_hwnd_for_exe_win32(target_norm: str) -> int | None:
     user32 = windll.user32
     kernel32 = windll.kernel32
 
-    result = [None]  # mutable to store hwnd in callback
+    result = []
+    pid_matches = {}  # pid -> bool, so each process is opened once per enumeration
 
     def enum_callback(hwnd, _lparam):
         try:
@@ -80,23 +112,72 @@ def _get_hwnd_for_exe_win32(target_norm: str) -> int | None:
             user32.GetWindowThreadProcessId(HWND(hwnd), byref(pid))
             if not pid.value:
                 return True
-            h = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
-            if not h:
-                return True
-            try:
-                size = DWORD(260)
-                buf = create_unicode_buffer(size.value)
-                if kernel32.QueryFullProcessImageNameW(HANDLE(h), 0, buf, byref(size)):
-                    path_norm = normalize_exe_path(buf.value)
-                    if path_norm == target_norm:
-                        result[0] = hwnd
-                        return False  # stop
-            finally:
-                kernel32.CloseHandle(HANDLE(h))
+            if pid.value not in pid_matches:
+                pid_matches[pid.value] = False
+                h = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+                if not h:
+                    return True
+                try:
+                    size = DWORD(260)
+                    buf = create_unicode_buffer(size.value)
+                    if kernel32.QueryFullProcessImageNameW(HANDLE(h), 0, buf, byref(size)):
+                        pid_matches[pid.value] = normalize_exe_path(buf.value) == target_norm
+                finally:
+                    kernel32.CloseHandle(HANDLE(h))
+            if pid_matches[pid.value]:
+                result.append(hwnd)
+                if first_only:
+                    return False  # stop
         except Exception:
             pass
         return True  # continue
 
     WNDENUMPROC = WINFUNCTYPE(c_bool, HWND, LPARAM)
     user32.EnumWindows(WNDENUMPROC(enum_callback), 0)
-    return result[0]
+    return result
+
+
+_x11_display = None
+
+
+def get_x11_display():
+    """Return a shared Xlib display connection (opened on first use)."""
+    global _x11_display
+    if _x11_display is None:
+        from Xlib import display
+        _x11_display = display.Display()
+    return _x11_display
+
+
+def _get_windows_for_exe_x11(target_norm: str, first_only: bool = False) -> list[int]:
+    from Xlib import X
+
+    d = get_x11_display()
+    root = d.screen().root
+    client_list = root.get_full_property(d.intern_atom("_NET_CLIENT_LIST"), X.AnyPropertyType)
+    if client_list is None:
+        return []
+    pid_atom = d.intern_atom("_NET_WM_PID")
+    result = []
+    pid_matches = {}
+    for win_id in client_list.value:
+        try:
+            win = d.create_resource_object("window", win_id)
+            if win.get_attributes().map_state != X.IsViewable:
+                continue
+            prop = win.get_full_property(pid_atom, X.AnyPropertyType)
+            if not prop or not prop.value:
+                continue
+            pid = int(prop.value[0])
+            if pid not in pid_matches:
+                try:
+                    pid_matches[pid] = normalize_exe_path(os.readlink(f"/proc/{pid}/exe")) == target_norm
+                except OSError:
+                    pid_matches[pid] = False
+            if pid_matches[pid]:
+                result.append(int(win_id))
+                if first_only:
+                    break
+        except Exception:
+            continue
+    return result
@@ -1,23 +1,46 @@
 # -*- coding: utf-8 -*-
-"""Global hotkey listener and one-shot capture for start/stop hotkeys."""
+"""Global hotkey listener (start/stop hotkeys, turbo trigger) and one-shot capture. Hotkeys are key codes (see keycodes)."""
+import time
+
 from pynput import keyboard
 
+from keycodes import KEY_NAMES, code_for_name
+from layout import code_for_pynput
+from trace_events import get_tracer
+
 
 class HotkeyManager:
-    def __init__(self, root, on_start, on_stop):
+    """
+    on_start(requested_at) / on_stop(requested_at) are called directly on the pynput listener thread
+    with the time.perf_counter() of the key press, so they must be thread-safe and must not touch Tk.
+    If turbo (a turbo_mode.TurboTrigger) is given, presses and releases of turbo_key are fed to it the
+    same way. Capture results are delivered on the Tk thread.
+    listener_factory (default pynput keyboard.Listener) creates the listeners; soak tests pass a fake.
+    """
+
+    def __init__(self, root, on_start, on_stop, turbo=None, listener_factory=None):
         self.root = root
+        self.listener_factory = listener_factory or keyboard.Listener
         self.on_start = on_start
         self.on_stop = on_stop
-        self.start_hotkey = "f9"
-        self.stop_hotkey = "f10"
+        self.turbo = turbo
+        self.start_hotkey = code_for_name("f9")
+        self.stop_hotkey = code_for_name("f10")
+        self.turbo_key = None
         self.listener = None
         self.capture_listener = None
         self.capturing_which = None
         self.capture_callback = None
 
-    def set_hotkeys(self, start: str, stop: str):
-        self.start_hotkey = start.lower()
-        self.stop_hotkey = stop.lower()
+    def set_hotkeys(self, start: int, stop: int):
+        self.start_hotkey = start
+        self.stop_hotkey = stop
+
+    def set_turbo_key(self, code: int | None):
+        """Set the hold-to-repeat trigger key (None = turbo off)."""
+        if code != self.turbo_key and self.turbo:
+            self.turbo.reset()
+        self.turbo_key = code
 
     def start_listener(self):
         if self.listener and self.listener.running:
@@ -25,7 +48,7 @@ class HotkeyManager:
                 self.listener.stop()
             except Exception:
                 pass
-        self.listener = keyboard.Listener(on_press=self._on_key)
+        self.listener = self.listener_factory(on_press=self._on_key, on_release=self._on_key_release)
         self.listener.start()
 
     def stop_listener(self):
@@ -45,47 +68,65 @@ class HotkeyManager:
         self.capture_callback = None
 
     def _on_key(self, key):
+        pressed_at = time.perf_counter()
         if self.capturing_which is not None:
             return
         try:
-            if not self.root.winfo_exists():
-                return
-            name = key.name.lower() if hasattr(key, "name") else (key.char or "").lower()
+            code = code_for_pynput(key)
         except Exception:
             return
-        if not name:
+        if code is None:
+            return
+        if code == self.turbo_key and self.turbo:
+            self.turbo.press(pressed_at)
             return
+        tracer = get_tracer()
+        if tracer and code in (self.start_hotkey, self.stop_hotkey):
+            tracer.instant("hotkey_" + ("start" if code == self.start_hotkey else "stop"), "hotkey", {"key": KEY_NAMES[code]})
         try:
-            if name == self.start_hotkey and self.root.winfo_exists():
-                self.root.after(0, self.on_start)
-            elif name == self.stop_hotkey and self.root.winfo_exists():
-                self.root.after(0, self.on_stop)
+            if code == self.start_hotkey:
+                self.on_start(pressed_at)
+            elif code == self.stop_hotkey:
+                self.on_stop(pressed_at)
         except Exception:
             pass
 
+    def _on_key_release(self, key):
+        released_at = time.perf_counter()
+        if self.turbo_key is None or not self.turbo or self.capturing_which is not None:
+            return
+        try:
+            code = code_for_pynput(key)
+        except Exception:
+            return
+        if code == self.turbo_key:
+            self.turbo.release(released_at)
+
     def capture(self, which: str, callback):
-        """Start one-shot capture; on key press call callback(which, key_name) and restart global listener."""
+        """Start one-shot capture; on key press call callback(which, key_code) and restart global listener."""
+        self.stop_listener()  # also clears any earlier capture state, so set the new one after it
         self.capturing_which = which
         self.capture_callback = callback
-        self.stop_listener()
-        self.capture_listener = keyboard.Listener(on_press=self._on_capture_key)
+        self.capture_listener = self.listener_factory(on_press=self._on_capture_key)
         self.capture_listener.start()
 
     def _on_capture_key(self, key):
         try:
-            name = key.name if hasattr(key, "name") else (key.char or "")
-            name = name.lower() if name else ""
+            code = code_for_pynput(key, register=True)  # the user picked this key; keep it even if new
         except Exception:
             return
-        if not name:
+        cb, which = self.capture_callback, self.capturing_which
+        if code is None or cb is None:
             return
-        if self.capture_callback and self.root.winfo_exists():
-            self.root.after(0, lambda: self._finish_capture(which=self.capturing_which, name=name))
+        self.capture_callback = None  # only the first key counts; later presses are ignored
+        tracer = get_tracer()
+        if tracer:
+            tracer.instant("hotkey_captured", "hotkey", {"which": which, "key": KEY_NAMES[code]})
+        if self.root.winfo_exists():
+            self.root.after(0, lambda: self._finish_capture(which, code, cb))
 
-    def _finish_capture(self, which, name):
+    def _finish_capture(self, which, code, cb):
         self.capturing_which = None
-        cb = self.capture_callback
-        self.capture_callback = None
         if self.capture_listener and self.capture_listener.running:
             try:
                 self.capture_listener.stop()
@@ -94,7 +135,7 @@ class HotkeyManager:
         self.capture_listener = None
         try:
             if self.root.winfo_exists() and cb:
-                cb(which, name)
+                cb(which, code)
             if self.root.winfo_exists():
                 self.start_listener()
         except Exception:
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+On-screen keyboard drawn on a single tk.Canvas (a rectangle and a label per key, no per-key widgets).
+
+Key geometry is computed once per layout (layout_geometry) together with a hit index: rows are
+fixed-height bands, so a click is resolved by one division (band) and one bisect (key in band).
+Selection and disabled state are changed by recoloring the key's canvas items through its tag.
+"""
+import tkinter as tk
+from bisect import bisect_right
+from collections import namedtuple
+
+from keycodes import code_for_name
+
+CHAR_PX = 7          # px per width unit (layout widths are in chars, as the old Tk buttons were)
+KEY_PAD_PX = 8       # added to every key's width
+KEY_HEIGHT_PX = 28
+GAP_PX = 2           # between keys and rows
+BLOCK_GAP_PX = 12    # between blocks (main / navigation / numpad)
+MARGIN_PX = 1
+ROW_PITCH_PX = KEY_HEIGHT_PX + GAP_PX
+KEY_FONT = ("Segoe UI", 9)
+
+NORMAL, SELECTED, DISABLED = "normal", "selected", "disabled"
+_FILL = {NORMAL: "#F0F0F0", SELECTED: "#87CEEB", DISABLED: "#C0C0C0"}
+_OUTLINE = "#8A8A8A"
+
+# x0, y0, x1, y1 are canvas px; row is the first row band, rows how many bands the key spans.
+KeyGeometry = namedtuple("KeyGeometry", "code label x0 y0 x1 y1 row rows")
+
+
+def layout_geometry(blocks) -> tuple[list, int, int]:
+    """Return (keys, width, height) for a layout (see layout.KEYBOARD_LAYOUTS); no Tk needed."""
+    keys = []
+    x_block = MARGIN_PX
+    n_rows = 0
+    for block in blocks:
+        block_width = 0
+        for r, (indent_px, items) in enumerate(block):
+            x = x_block + indent_px
+            y = MARGIN_PX + r * ROW_PITCH_PX
+            for item in items:
+                label, name = item[0], item[1]
+                width = item[2] if len(item) > 2 else (4 if len(label) <= 2 else 6)
+                rows = item[3] if len(item) > 3 else 1
+                px = round(width * CHAR_PX + KEY_PAD_PX)
+                if name:
+                    keys.append(KeyGeometry(code_for_name(name), label, x, y, x + px, y + rows * ROW_PITCH_PX - GAP_PX, r, rows))
+                    n_rows = max(n_rows, r + rows)
+                x += px + GAP_PX
+            block_width = max(block_width, x - GAP_PX - x_block)
+        x_block += block_width + BLOCK_GAP_PX
+    return keys, x_block - BLOCK_GAP_PX + MARGIN_PX, n_rows * ROW_PITCH_PX - GAP_PX + 2 * MARGIN_PX
+
+
+def build_hit_index(keys) -> list[tuple[list, list]]:
+    """Per row band: (sorted x0 list, matching keys). A key spanning several rows is in each band."""
+    bands = {}
+    for key in keys:
+        for r in range(key.row, key.row + key.rows):
+            bands.setdefault(r, []).append(key)
+    index = []
+    for r in range(max(bands) + 1 if bands else 0):
+        row = sorted(bands.get(r, ()), key=lambda k: k.x0)
+        index.append(([k.x0 for k in row], row))
+    return index
+
+
+def hit_test(index, x: float, y: float) -> KeyGeometry | None:
+    """Return the key under canvas point (x, y), or None (gaps and margins hit nothing)."""
+    band = int((y - MARGIN_PX) // ROW_PITCH_PX)
+    if not 0 <= band < len(index):
+        return None
+    x0s, row = index[band]
+    i = bisect_right(x0s, x) - 1
+    if i < 0:
+        return None
+    key = row[i]
+    return key if x < key.x1 and key.y0 <= y < key.y1 else None
+
+
+class KeyboardCanvas:
+    """
+    The on-screen keyboard. on_toggle(code) is called when an enabled key is clicked. A code drawn
+    more than once in a layout shares one state (all its rectangles carry the same tag).
+    """
+
+    def __init__(self, parent, blocks, on_toggle):
+        self.on_toggle = on_toggle
+        self.canvas = tk.Canvas(parent, highlightthickness=0, bd=0)
+        self.keys = []
+        self._index = []
+        self._states = {}
+        self._cursor = ""
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.set_layout(blocks)
+
+    def set_layout(self, blocks) -> None:
+        """Redraw for another layout; key states are kept."""
+        canvas = self.canvas
+        canvas.delete("all")
+        self.keys, width, height = layout_geometry(blocks)
+        self._index = build_hit_index(self.keys)
+        for key in self.keys:
+            tag = f"k{key.code}"
+            canvas.create_rectangle(key.x0, key.y0, key.x1, key.y1, outline=_OUTLINE,
+                                    fill=_FILL[self._states.get(key.code, NORMAL)], tags=(tag,))
+            canvas.create_text((key.x0 + key.x1) / 2, (key.y0 + key.y1) / 2, text=key.label, font=KEY_FONT)
+        canvas.config(width=width, height=height)
+
+    def key_at(self, x: float, y: float) -> int | None:
+        key = hit_test(self._index, x, y)
+        return key.code if key is not None else None
+
+    def set_state(self, code: int, state: str) -> None:
+        """Set one key's state (NORMAL, SELECTED or DISABLED); only recolors if it changed."""
+        if self._states.get(code, NORMAL) == state:
+            return
+        self._states[code] = state
+        self.canvas.itemconfigure(f"k{code}", fill=_FILL[state])
+
+    def repaint(self, selected, disabled) -> None:
+        """Bring every key in line with the selected and disabled code sets (changed keys only)."""
+        for code in {key.code for key in self.keys} | set(self._states):
+            self.set_state(code, DISABLED if code in disabled else SELECTED if code in selected else NORMAL)
+
+    def _on_click(self, event):
+        code = self.key_at(event.x, event.y)
+        if code is not None and self._states.get(code, NORMAL) != DISABLED:
+            self.on_toggle(code)
+
+    def _on_motion(self, event):
+        code = self.key_at(event.x, event.y)
+        cursor = "hand2" if code is not None and self._states.get(code, NORMAL) != DISABLED else ""
+        if cursor != self._cursor:
+            self._cursor = cursor
+            self.canvas.config(cursor=cursor)
@@ -1,10 +1,79 @@
 # -*- coding: utf-8 -*-
 """
-Entry point: run KeyboardRepeaterApp.
+Entry point: run KeyboardRepeaterApp, or hand the launch arguments to an already running instance.
 """
-from app import KeyboardRepeaterApp
+import sys
+
+from single_instance import acquire_or_forward, launch_commands
+
+
+class LaunchArgs:
+    def __init__(self, profile=None, start=False, stop=False):
+        self.profile = profile
+        self.start = start
+        self.stop = stop
+
+
+def parse_args(argv=None):
+    """
+    Parse --profile/--start/--stop. The common forms are parsed by hand because importing
+    argparse costs more than the whole handoff; anything else (e.g. --help) goes to argparse.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = LaunchArgs()
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == "--start":
+            args.start = True
+        elif a == "--stop":
+            args.stop = True
+        elif a == "--profile" and i + 1 < len(argv):
+            args.profile = argv[i + 1]
+            i += 1
+        elif a.startswith("--profile="):
+            args.profile = a.split("=", 1)[1]
+        else:
+            return _parse_args_full(argv)
+        i += 1
+    return args
+
+
+def _parse_args_full(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Keyboard Repeater")
+    parser.add_argument("--profile", help="profile name (in the profiles folder) or config file path to load")
+    parser.add_argument("--start", action="store_true", help="start repeating")
+    parser.add_argument("--stop", action="store_true", help="stop repeating")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commands = launch_commands(args.profile, args.start, args.stop)
+    try:
+        lock, replies = acquire_or_forward(commands)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except Exception as e:  # e.g. config folder not writable for the lock file
+        print(f"Keyboard Repeater: could not hand off to or start an instance: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    if replies is not None:
+        # Handed off to the running instance; the GUI stack (tkinter, pynput) is never imported.
+        failed = [r for r in replies if not r.get("ok")]
+        for r in failed:
+            print("Running instance: " + r.get("error", "error"), file=sys.stderr)
+        return 1 if failed else 0
+    try:
+        from app import KeyboardRepeaterApp
+        app = KeyboardRepeaterApp()
+        app.apply_launch_args(args.profile, args.start, args.stop)
+        app.run()
+    finally:
+        lock.release()
+    return 0
 
 
 if __name__ == "__main__":
-    app = KeyboardRepeaterApp()
-    app.run()
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Key registry: every key gets a small integer code; per-backend codes live in arrays indexed by it.
+
+Code is carried everywhere internally (selection, engine, hotkeys, backends); key names such as
+"f9" or "numpad_add" are used only at the JSON/config boundary, in layout tables and in logs.
+Pure Python, no GUI or pynput imports (the pynput table is built in layout.py), so it is cheap to
+import from the single-instance handoff path.
+"""
+import sys
+import threading
+from array import array
+
+# (name, Windows VK, extended flag, X11 keysym), in registration order: modifiers and navigation,
+# generated ranges (letters, digits, F-keys, numpad digits), punctuation, then system and numpad keys.
+_NAV_KEYS = (
+    ("esc", 0x1B, 0, 0xFF1B), ("tab", 0x09, 0, 0xFF09), ("caps_lock", 0x14, 0, 0xFFE5),
+    ("shift", 0x10, 0, 0xFFE1), ("shift_r", 0x10, 1, 0xFFE2),
+    ("ctrl", 0x11, 0, 0xFFE3), ("ctrl_r", 0x11, 1, 0xFFE4),
+    ("alt", 0x12, 0, 0xFFE9), ("alt_r", 0x12, 1, 0xFFEA),
+    ("cmd", 0x5B, 0, 0xFFEB), ("cmd_r", 0x5C, 1, 0xFFEC),
+    ("space", 0x20, 0, 0x0020), ("enter", 0x0D, 0, 0xFF0D), ("backspace", 0x08, 0, 0xFF08),
+    ("insert", 0x2D, 1, 0xFF63), ("delete", 0x2E, 1, 0xFFFF),
+    ("home", 0x24, 1, 0xFF50), ("end", 0x23, 1, 0xFF57),
+    ("page_up", 0x21, 1, 0xFF55), ("page_down", 0x22, 1, 0xFF56),
+    ("up", 0x26, 1, 0xFF52), ("down", 0x28, 1, 0xFF54), ("left", 0x25, 1, 0xFF51), ("right", 0x27, 1, 0xFF53),
+)
+_PUNCTUATION_KEYS = (
+    ("-", 0xBD, 0, 0x002D), ("=", 0xBB, 0, 0x003D), ("[", 0xDB, 0, 0x005B), ("]", 0xDD, 0, 0x005D),
+    ("\\", 0xDC, 0, 0x005C), (";", 0xBA, 0, 0x003B), ("'", 0xDE, 0, 0x0027),
+    (",", 0xBC, 0, 0x002C), (".", 0xBE, 0, 0x002E), ("/", 0xBF, 0, 0x002F), ("`", 0xC0, 0, 0x0060),
+)
+_SYSTEM_KEYS = (
+    ("print_screen", 0x2C, 1, 0xFF61), ("scroll_lock", 0x91, 0, 0xFF14), ("pause", 0x13, 0, 0xFF13),
+    ("menu", 0x5D, 1, 0xFF67),
+    ("num_lock", 0x90, 1, 0xFF7F),
+    ("numpad_divide", 0x6F, 1, 0xFFAF), ("numpad_multiply", 0x6A, 0, 0xFFAA),
+    ("numpad_subtract", 0x6D, 0, 0xFFAD), ("numpad_add", 0x6B, 0, 0xFFAB),
+    ("numpad_enter", 0x0D, 1, 0xFF8D), ("numpad_decimal", 0x6E, 0, 0xFFAE),
+)
+
+
+def _generated_keys():
+    keys = [(c, ord(c.upper()), 0, ord(c)) for c in "abcdefghijklmnopqrstuvwxyz"]
+    keys += [(d, ord(d), 0, ord(d)) for d in "0123456789"]
+    keys += [(f"f{i}", 0x70 + i - 1, 0, 0xFFBE + i - 1) for i in range(1, 13)]
+    keys += [(f"f{i}", 0x70 + i - 1, 0, 0xFFBE + i - 1) for i in range(13, 25)]  # not on the on-screen keyboard
+    keys += [(f"numpad_{i}", 0x60 + i, 0, 0xFFB0 + i) for i in range(10)]
+    return keys
+
+
+KEY_NAMES = []          # code -> name
+NAME_TO_CODE = {}       # name -> code
+VK_CODES = array("H")   # code -> Windows virtual-key code (0 = none)
+VK_EXTENDED = array("B")  # code -> 1 if the key sets the extended-key flag
+VK_SCAN = array("H")    # code -> scan code (Windows only, filled at import; 0 elsewhere)
+X11_KEYSYMS = array("L")  # code -> X11 keysym (0 = none)
+# Keys are registered from the Tk thread (config loads) and the hotkey capture listener; a code is
+# only valid once its name and every array entry have been appended.
+_registry_lock = threading.Lock()
+
+
+def _map_scan(vk: int) -> int:
+    if sys.platform != "win32" or not vk:
+        return 0
+    from ctypes import windll
+    return windll.user32.MapVirtualKeyW(vk, 0) & 0xFFFF  # MAPVK_VK_TO_VSC
+
+
+def register_key(name: str, vk: int = 0, extended: int = 0, keysym: int = 0) -> int:
+    """Add a key to the registry (or return its existing code). Unknown single characters get VK/keysym derived from the char."""
+    code = NAME_TO_CODE.get(name)
+    if code is not None:
+        return code
+    if len(name) == 1:
+        if not keysym and 0x20 <= ord(name) < 0x7F:
+            keysym = ord(name)
+        if not vk and name.isalnum() and name.isascii():
+            vk = ord(name.upper())
+    with _registry_lock:
+        code = NAME_TO_CODE.get(name)
+        if code is not None:
+            return code
+        code = len(KEY_NAMES)
+        VK_CODES.append(vk)
+        VK_EXTENDED.append(extended)
+        VK_SCAN.append(_map_scan(vk))
+        X11_KEYSYMS.append(keysym)
+        KEY_NAMES.append(name)
+        NAME_TO_CODE[name] = code  # published last: readers never see a code without its entries
+    return code
+
+
+for _entry in _NAV_KEYS + tuple(_generated_keys()) + _PUNCTUATION_KEYS + _SYSTEM_KEYS:
+    register_key(*_entry)
+del _entry
+
+
+def code_for_name(name: str, register: bool = True) -> int | None:
+    """Return the code for a key name (case-insensitive); unknown names are registered unless register=False."""
+    code = NAME_TO_CODE.get(name)
+    if code is None:
+        lowered = name.lower()
+        code = NAME_TO_CODE.get(lowered)
+        if code is None and register and lowered:
+            code = register_key(lowered)
+    return code
+
+
+def key_name(code: int) -> str:
+    """Return the name of a key code (for config files, logs and labels)."""
+    return KEY_NAMES[code]
+
+
+def codes_to_names(codes) -> list[str]:
+    return [KEY_NAMES[c] for c in codes]
+
+
+def names_to_codes(names) -> list[int]:
+    """Translate key names from a config file to codes (unknown names are registered)."""
+    return [code_for_name(n) for n in names if n]
@@ -1,18 +1,19 @@
 # -*- coding: utf-8 -*-
-"""Keyboard layout definitions and key_id -> pynput mapping. Cross-platform: Windows, Linux, macOS."""
+"""Keyboard layout definitions and key code -> pynput mapping. Cross-platform: Windows, Linux, macOS."""
 import sys
+import threading
+
 from pynput.keyboard import Key, KeyCode
 
-_IS_WINDOWS = sys.platform == "win32"
+from keycodes import KEY_NAMES, NAME_TO_CODE, VK_CODES, code_for_name
 
-# Windows VK codes for numpad (used only on Windows)
-if _IS_WINDOWS:
-    VK_NUMLOCK = 0x90
-    VK_NUMPAD0, VK_NUMPAD1, VK_NUMPAD2, VK_NUMPAD3, VK_NUMPAD4 = 0x60, 0x61, 0x62, 0x63, 0x64
-    VK_NUMPAD5, VK_NUMPAD6, VK_NUMPAD7, VK_NUMPAD8, VK_NUMPAD9 = 0x65, 0x66, 0x67, 0x68, 0x69
-    VK_MULTIPLY, VK_ADD, VK_SUBTRACT, VK_DECIMAL, VK_DIVIDE = 0x6A, 0x6B, 0x6D, 0x6E, 0x6F
+_IS_WINDOWS = sys.platform == "win32"
 
-# Main keyboard: each row is (indent_px, [keys]). Key is (label, key_id) or (label, key_id, width_chars).
+# Keyboard layouts for the on-screen keyboard (keyboard_canvas). A layout is a list of blocks drawn
+# left to right; a block is a list of rows (indent_px, [keys]). Key is (label, key_name),
+# (label, key_name, width_chars) or (label, key_name, width_chars, height_rows); key_name None is a gap.
+# A key of width w is w * 7 + 8 px wide (default 4 for short labels, 6 otherwise); see keyboard_canvas.
+# Key names are keycodes registry names; the UI resolves them to codes once when it is built.
 MAIN_LAYOUT = [
     (0, [("F1", "f1"), ("F2", "f2"), ("F3", "f3"), ("F4", "f4"), ("F5", "f5"), ("F6", "f6"),
          ("F7", "f7"), ("F8", "f8"), ("F9", "f9"), ("F10", "f10"), ("F11", "f11"), ("F12", "f12")]),
@@ -30,64 +31,116 @@ MAIN_LAYOUT = [
 ]
 
 NUMPAD_LAYOUT = [
-    [("NumLock", "num_lock", 8), ("/", "numpad_divide"), ("*", "numpad_multiply"), ("-", "numpad_subtract")],
-    [("7", "numpad_7"), ("8", "numpad_8"), ("9", "numpad_9"), ("+", "numpad_add", 5)],
-    [("4", "numpad_4"), ("5", "numpad_5"), ("6", "numpad_6")],
-    [("1", "numpad_1"), ("2", "numpad_2"), ("3", "numpad_3"), ("Enter", "numpad_enter", 6)],
-    [("0", "numpad_0", 10), (".", "numpad_decimal")],
+    (0, [("NumLock", "num_lock", 8), ("/", "numpad_divide"), ("*", "numpad_multiply"), ("-", "numpad_subtract")]),
+    (0, [("7", "numpad_7"), ("8", "numpad_8"), ("9", "numpad_9"), ("+", "numpad_add", 5)]),
+    (0, [("4", "numpad_4"), ("5", "numpad_5"), ("6", "numpad_6")]),
+    (0, [("1", "numpad_1"), ("2", "numpad_2"), ("3", "numpad_3"), ("Enter", "numpad_enter", 6)]),
+    (0, [("0", "numpad_0", 10), (".", "numpad_decimal")]),
+]
+
+
+def _u(units: float) -> float:
+    """Width in chars of a key that is units standard keys wide (1u = 36 px + 2 px gap)."""
+    return (units * 38 - 10) / 7
+
+
+# Full-size 104-key keyboard: main block, navigation cluster, numpad with tall + and Enter.
+FULL_MAIN_LAYOUT = [
+    (0, [("Esc", "esc"), ("", None, _u(1))] + [(f"F{i}", f"f{i}") for i in range(1, 5)] + [("", None, _u(0.5))]
+        + [(f"F{i}", f"f{i}") for i in range(5, 9)] + [("", None, _u(0.5))] + [(f"F{i}", f"f{i}") for i in range(9, 13)]),
+    (0, [("`", "`")] + [(d, d) for d in "1234567890"] + [("-", "-"), ("=", "="), ("Backspace", "backspace", _u(2))]),
+    (0, [("Tab", "tab", _u(1.5))] + [(c.upper(), c) for c in "qwertyuiop"] + [("[", "["), ("]", "]"), ("\\", "\\", _u(1.5))]),
+    (0, [("Caps", "caps_lock", _u(1.75))] + [(c.upper(), c) for c in "asdfghjkl"] + [(";", ";"), ("'", "'"), ("Enter", "enter", _u(2.25))]),
+    (0, [("Shift", "shift", _u(2.25))] + [(c.upper(), c) for c in "zxcvbnm"] + [(",", ","), (".", "."), ("/", "/"), ("Shift", "shift_r", _u(2.75))]),
+    (0, [("Ctrl", "ctrl", _u(1.25)), ("Win", "cmd", _u(1.25)), ("Alt", "alt", _u(1.25)), ("Space", "space", _u(6.25)),
+         ("Alt", "alt_r", _u(1.25)), ("Win", "cmd_r", _u(1.25)), ("Menu", "menu", _u(1.25)), ("Ctrl", "ctrl_r", _u(1.25))]),
+]
+
+NAV_LAYOUT = [
+    (0, [("PrtSc", "print_screen", _u(1)), ("ScrLk", "scroll_lock", _u(1)), ("Pause", "pause", _u(1))]),
+    (0, [("Ins", "insert", _u(1)), ("Home", "home", _u(1)), ("PgUp", "page_up", _u(1))]),
+    (0, [("Del", "delete", _u(1)), ("End", "end", _u(1)), ("PgDn", "page_down", _u(1))]),
+    (0, []),
+    (38, [("↑", "up")]),
+    (0, [("←", "left"), ("↓", "down"), ("→", "right")]),
+]
+
+FULL_NUMPAD_LAYOUT = [
+    (0, []),
+    (0, [("Num", "num_lock", _u(1)), ("/", "numpad_divide"), ("*", "numpad_multiply"), ("-", "numpad_subtract")]),
+    (0, [("7", "numpad_7"), ("8", "numpad_8"), ("9", "numpad_9"), ("+", "numpad_add", _u(1), 2)]),
+    (0, [("4", "numpad_4"), ("5", "numpad_5"), ("6", "numpad_6")]),
+    (0, [("1", "numpad_1"), ("2", "numpad_2"), ("3", "numpad_3"), ("Enter", "numpad_enter", _u(1), 2)]),
+    (0, [("0", "numpad_0", _u(2)), (".", "numpad_decimal")]),
 ]
 
-def _base_key_map():
-    """Keys common to all platforms."""
-    return {
-        "esc": Key.esc, "tab": Key.tab, "caps_lock": Key.caps_lock, "shift": Key.shift, "shift_r": Key.shift_r,
-        "ctrl": Key.ctrl, "ctrl_r": Key.ctrl_r, "alt": Key.alt, "alt_r": Key.alt_r,
-        "cmd": Key.cmd, "cmd_r": Key.cmd_r,
-        "space": Key.space, "enter": Key.enter, "backspace": Key.backspace,
-        "f1": Key.f1, "f2": Key.f2, "f3": Key.f3, "f4": Key.f4, "f5": Key.f5, "f6": Key.f6,
-        "f7": Key.f7, "f8": Key.f8, "f9": Key.f9, "f10": Key.f10, "f11": Key.f11, "f12": Key.f12,
-        "insert": Key.insert, "delete": Key.delete, "home": Key.home, "end": Key.end,
-        "page_up": Key.page_up, "page_down": Key.page_down,
-        "up": Key.up, "down": Key.down, "left": Key.left, "right": Key.right,
-    }
-
-
-def _numpad_key_map_windows():
-    """Numpad keys using Windows VK codes."""
-    return {
-        "num_lock": KeyCode.from_vk(VK_NUMLOCK),
-        "numpad_0": KeyCode.from_vk(VK_NUMPAD0), "numpad_1": KeyCode.from_vk(VK_NUMPAD1),
-        "numpad_2": KeyCode.from_vk(VK_NUMPAD2), "numpad_3": KeyCode.from_vk(VK_NUMPAD3),
-        "numpad_4": KeyCode.from_vk(VK_NUMPAD4), "numpad_5": KeyCode.from_vk(VK_NUMPAD5),
-        "numpad_6": KeyCode.from_vk(VK_NUMPAD6), "numpad_7": KeyCode.from_vk(VK_NUMPAD7),
-        "numpad_8": KeyCode.from_vk(VK_NUMPAD8), "numpad_9": KeyCode.from_vk(VK_NUMPAD9),
-        "numpad_decimal": KeyCode.from_vk(VK_DECIMAL), "numpad_add": KeyCode.from_vk(VK_ADD),
-        "numpad_subtract": KeyCode.from_vk(VK_SUBTRACT), "numpad_multiply": KeyCode.from_vk(VK_MULTIPLY),
-        "numpad_divide": KeyCode.from_vk(VK_DIVIDE), "numpad_enter": Key.enter,
-    }
-
-
-def _numpad_key_map_linux_or_mac():
-    """Numpad keys on Linux/macOS: use char/Key fallback (platform keycodes vary)."""
-    return {
-        "num_lock": getattr(Key, "num_lock", Key.enter),
-        "numpad_0": "0", "numpad_1": "1", "numpad_2": "2", "numpad_3": "3", "numpad_4": "4",
-        "numpad_5": "5", "numpad_6": "6", "numpad_7": "7", "numpad_8": "8", "numpad_9": "9",
-        "numpad_decimal": ".", "numpad_add": "+", "numpad_subtract": "-",
-        "numpad_multiply": "*", "numpad_divide": "/", "numpad_enter": Key.enter,
-    }
-
-
-if _IS_WINDOWS:
-    _numpad_map = _numpad_key_map_windows()
-else:
-    _numpad_map = _numpad_key_map_linux_or_mac()
-
-KEY_ID_TO_PYNPUT = {**_base_key_map(), **_numpad_map}
-
-
-def key_id_to_press(key_id: str):
-    """Convert key_id to pynput Key or char for press/release."""
-    if key_id in KEY_ID_TO_PYNPUT:
-        return KEY_ID_TO_PYNPUT[key_id]
-    return key_id
+# Layout name (config "keyboard_layout") -> blocks. Adding a layout is one entry here.
+KEYBOARD_LAYOUTS = {
+    "compact": [MAIN_LAYOUT, NUMPAD_LAYOUT],
+    "full": [FULL_MAIN_LAYOUT, NAV_LAYOUT, FULL_NUMPAD_LAYOUT],
+}
+DEFAULT_KEYBOARD_LAYOUT = "compact"
+
+# Numpad keys on Linux/macOS: char/Key fallback (platform keycodes vary).
+_NUMPAD_CHAR_FALLBACK = {
+    "numpad_decimal": ".", "numpad_add": "+", "numpad_subtract": "-",
+    "numpad_multiply": "*", "numpad_divide": "/",
+}
+
+
+def _pynput_for_name(name: str):
+    """pynput Key/KeyCode or char to press for a registry key name."""
+    if name.startswith("numpad_") or name == "num_lock":
+        if name == "numpad_enter":
+            return Key.enter
+        if _IS_WINDOWS:
+            return KeyCode.from_vk(VK_CODES[NAME_TO_CODE[name]])
+        if name == "num_lock":
+            return getattr(Key, "num_lock", Key.enter)
+        return _NUMPAD_CHAR_FALLBACK.get(name, name[len("numpad_"):])
+    key = getattr(Key, name, None)
+    if isinstance(key, Key):
+        return key
+    return name
+
+
+# code -> object for controller.press/release, built once at import (extended if keys are registered later).
+PYNPUT_KEYS = [_pynput_for_name(n) for n in KEY_NAMES]
+_pynput_keys_lock = threading.Lock()
+
+# pynput Key member -> code, for the global listener (chars are looked up by name).
+_PYNPUT_KEY_TO_CODE = {}
+for _code, _k in enumerate(PYNPUT_KEYS):
+    if isinstance(_k, Key) and not KEY_NAMES[_code].startswith("numpad_"):
+        _PYNPUT_KEY_TO_CODE.setdefault(_k, _code)
+del _code, _k
+
+
+def code_to_press(code: int):
+    """Convert a key code to the pynput Key or char for press/release."""
+    try:
+        return PYNPUT_KEYS[code]
+    except IndexError:
+        with _pynput_keys_lock:  # the engine and the Tk thread may both catch up at once
+            PYNPUT_KEYS.extend(_pynput_for_name(n) for n in KEY_NAMES[len(PYNPUT_KEYS):code + 1])
+        return PYNPUT_KEYS[code]
+
+
+def code_for_pynput(key, register: bool = False) -> int | None:
+    """
+    Return the key code for a key reported by a pynput listener, or None if it has no name or is not
+    in the registry. The global listener sees every key typed system-wide, so only an explicit
+    hotkey capture passes register=True to add a key the registry does not know yet.
+    """
+    code = _PYNPUT_KEY_TO_CODE.get(key)
+    if code is not None:
+        return code
+    name = getattr(key, "name", None)
+    if name is None:
+        name = getattr(key, "char", None)
+    if not name:
+        return None
+    code = code_for_name(name, register=register)
+    if code is not None and isinstance(key, Key):
+        _PYNPUT_KEY_TO_CODE[key] = code
+    return code
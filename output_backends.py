@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Output backends: where repeated keys go. Every backend takes a whole round at once through
+send_many(events, target=None), where events are key codes (one press + release each) and target is
+a window id for backends that can address a window directly, or None for the focused window.
+
+Text mode: prepare_text(text, chunk_chars) segments a string once into backend-ready chunks
+(e.g. UTF-16 units for WM_CHAR, keycode/modifier pairs for X11), then type_text(chunk, target)
+emits one chunk per call and returns the number of characters typed.
+
+Capability flags (class attributes):
+    supports_foreground  can send to the focused window (target=None)
+    supports_targeting   can send to a given window (target=window id from foreground_exe)
+    supports_batching    send_many is cheaper than one call per key (one flush / no per-key setup)
+    parallel_targets     windows may be served from several threads at once; otherwise the engine
+                         hands the whole round to send_to_windows on its own thread
+    supports_text        implements prepare_text/type_text
+    max_rate             keys (or characters) per second the backend can sustain, None = no known limit
+"""
+import sys
+import threading
+
+from keycodes import KEY_NAMES
+
+# Name used in configs for "pynput to the focused window, platform backend for target windows".
+AUTO_BACKEND = "auto"
+
+
+class OutputBackend:
+    name = ""
+    supports_foreground = False
+    supports_targeting = False
+    supports_batching = False
+    supports_text = False
+    parallel_targets = False
+    max_rate = None
+
+    def send_many(self, events, target=None) -> int:
+        """Send each key code in events (press + release) to target. Returns the number of keys sent."""
+        raise NotImplementedError
+
+    def send_to_windows(self, events, targets) -> list[int]:
+        """Send the same keys to every window in targets, in order. Returns the keys sent per window."""
+        return [self.send_many(events, target) for target in targets]
+
+    def prepare_text(self, text: str, chunk_chars: int) -> list:
+        """Segment text into chunks for type_text (done once per run, not per round)."""
+        return [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+
+    def type_text(self, chunk, target=None) -> int:
+        """Type one prepared chunk to target. Returns the number of characters typed."""
+        raise NotImplementedError
+
+
+class PynputBackend(OutputBackend):
+    """Synthesised input via pynput's keyboard Controller; always goes to the focused window."""
+    name = "pynput"
+    supports_foreground = True
+    supports_text = True
+    # SendInput / XTest inject one event per call; beyond ~1000 keys/s apps start to drop them.
+    max_rate = 1000
+
+    def __init__(self, controller=None):
+        if controller is None:
+            from pynput.keyboard import Controller
+            controller = Controller()
+        self.controller = controller
+        from layout import code_to_press
+        self._code_to_press = code_to_press
+
+    def send_many(self, events, target=None) -> int:
+        press, release, to_press = self.controller.press, self.controller.release, self._code_to_press
+        sent = 0
+        for code in events:
+            k = to_press(code)
+            press(k)
+            release(k)
+            sent += 1
+        return sent
+
+    def type_text(self, chunk, target=None) -> int:
+        # Controller.type maps each character to a key, or injects it as Unicode when it has none.
+        self.controller.type(chunk)
+        return len(chunk)
+
+
+class Win32PostMessageBackend(OutputBackend):
+    """WM_KEYDOWN/WM_KEYUP posted to a window (win32_send_keys); works while the window is in the background."""
+    name = "win32"
+    supports_targeting = True
+    supports_batching = True
+    supports_text = True
+    parallel_targets = True  # PostMessage only queues; windows do not share any state
+    # A thread's message queue holds 10000 messages (two per key); stay well under that per second.
+    max_rate = 2500
+
+    def __init__(self):
+        from win32_send_keys import post_chars_to_hwnd, send_keys_to_hwnd, text_to_char_units
+        self._send = send_keys_to_hwnd
+        self._post_chars = post_chars_to_hwnd
+        self._to_units = text_to_char_units
+
+    def send_many(self, events, target=None) -> int:
+        return self._send(target, events) if target is not None else 0
+
+    def prepare_text(self, text: str, chunk_chars: int) -> list:
+        units = self._to_units(text)
+        return [units[i:i + chunk_chars] for i in range(0, len(units), chunk_chars)]
+
+    def type_text(self, chunk, target=None) -> int:
+        return self._post_chars(target, chunk) if target is not None else 0
+
+
+class X11SendEventBackend(OutputBackend):
+    """XSendEvent key events to an X11 window (x11_send_keys), flushed once per batch."""
+    name = "x11"
+    supports_targeting = True
+    supports_batching = True
+    supports_text = True
+
+    def __init__(self):
+        from x11_send_keys import send_key_events_to_window, send_keys_to_window, send_keys_to_windows, text_to_key_events
+        self._send = send_keys_to_window
+        self._send_windows = send_keys_to_windows
+        self._send_events = send_key_events_to_window
+        self._to_events = text_to_key_events
+
+    def send_many(self, events, target=None) -> int:
+        return self._send(target, events) if target is not None else 0
+
+    def send_to_windows(self, events, targets) -> list[int]:
+        # All windows go out over the one shared display connection with a single flush.
+        return self._send_windows(targets, events)
+
+    def prepare_text(self, text: str, chunk_chars: int) -> list:
+        # Characters with no key on the current keyboard mapping are dropped here, once.
+        events = self._to_events(text)
+        return [events[i:i + chunk_chars] for i in range(0, len(events), chunk_chars)]
+
+    def type_text(self, chunk, target=None) -> int:
+        return self._send_events(target, chunk) if target is not None else 0
+
+
+class NullBackend(OutputBackend):
+    """Discards every key but counts them; for benchmarks, soak tests and dry runs."""
+    name = "null"
+    supports_foreground = True
+    supports_targeting = True
+    supports_batching = True
+    supports_text = True
+    parallel_targets = True  # exercises the engine's send pool in soak tests
+
+    def __init__(self):
+        self.calls = 0
+        self.keys = 0
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def send_many(self, events, target=None) -> int:
+        n = len(events)
+        with self._lock:
+            self.calls += 1
+            self.keys += n
+        return n
+
+    def type_text(self, chunk, target=None) -> int:
+        with self._lock:
+            self.calls += 1
+            self.chars += len(chunk)
+        return len(chunk)
+
+
+class RecordingBackend(OutputBackend):
+    """
+    Appends what would be sent to a timeline as (time, action, key_name, target) tuples, using
+    clock.now() (e.g. an engine_clock.VirtualClock): focused-window keys as "press"/"release" pairs,
+    window keys as one "send" entry per key, text as one "type" entry per chunk (the chunk in place
+    of the key name).
+    """
+    name = "recording"
+    supports_foreground = True
+    supports_targeting = True
+    supports_batching = True
+    supports_text = True
+
+    def __init__(self, clock, timeline: list | None = None):
+        self.clock = clock
+        self.timeline = timeline if timeline is not None else []
+
+    def send_many(self, events, target=None) -> int:
+        now = self.clock.now()
+        append = self.timeline.append
+        for code in events:
+            name = KEY_NAMES[code]
+            if target is None:
+                append((now, "press", name, None))
+                append((now, "release", name, None))
+            else:
+                append((now, "send", name, target))
+        return len(events)
+
+    def type_text(self, chunk, target=None) -> int:
+        self.timeline.append((self.clock.now(), "type", chunk, target))
+        return len(chunk)
+
+
+_BACKENDS = {
+    PynputBackend.name: PynputBackend,
+    Win32PostMessageBackend.name: Win32PostMessageBackend,
+    X11SendEventBackend.name: X11SendEventBackend,
+    NullBackend.name: NullBackend,
+}
+_platform_target_backend = ()
+
+
+def get_platform_target_backend() -> OutputBackend | None:
+    """The window-targeting backend of this platform (created once), or None if unavailable."""
+    global _platform_target_backend
+    if _platform_target_backend == ():
+        backend = None
+        try:
+            if sys.platform == "win32":
+                backend = Win32PostMessageBackend()
+            elif sys.platform.startswith("linux"):
+                backend = X11SendEventBackend()
+        except Exception:  # python-xlib missing or no X11 display
+            backend = None
+        _platform_target_backend = backend
+    return _platform_target_backend
+
+
+def available_backends() -> list[str]:
+    """Backend names that can be used on this machine ("auto" first), e.g. for the UI."""
+    names = [AUTO_BACKEND, PynputBackend.name]
+    target = get_platform_target_backend()
+    if target is not None:
+        names.append(target.name)
+    names.append(NullBackend.name)
+    return names
+
+
+def create_backend(name: str, controller=None) -> OutputBackend | None:
+    """Return a backend for a config name, or None for "auto" (engine picks per round). Raises ValueError if unknown."""
+    if not name or name == AUTO_BACKEND:
+        return None
+    if name == PynputBackend.name:
+        return PynputBackend(controller)
+    target = get_platform_target_backend()
+    if target is not None and name == target.name:
+        return target
+    cls = _BACKENDS.get(name)
+    if cls is None:
+        raise ValueError(f"unknown output backend: {name!r}")
+    return cls()
@@ -2,14 +2,54 @@
 """Background repeat loop: press selected keys at interval until stop_event is set."""
 import sys
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
-from foreground_exe import get_hwnd_for_exe
-from layout import key_id_to_press
+from engine_clock import REAL_CLOCK
+from foreground_exe import get_target_windows
+from keycodes import KEY_NAMES
+from output_backends import OutputBackend, PynputBackend, get_platform_target_backend
+from trace_events import get_tracer
 
-if sys.platform == "win32":
-    from win32_send_keys import send_key_to_hwnd as _send_key_to_hwnd
-else:
-    _send_key_to_hwnd = None
+# Upper bound on worker threads used to fan out one round to several target windows.
+MAX_SEND_WORKERS = 8
+# Text mode: characters per type_text call, and the pacing step when a chars/sec ceiling applies.
+TEXT_CHUNK_CHARS = 64
+TEXT_PACE_SEC = 0.05
+
+
+class LoopOptions(NamedTuple):
+    """
+    Engine options for run_repeat_loop. The defaults repeat keys through the auto backend on the real
+    clock, with a private stats dict.
+    backend: output backend (see output_backends). None ("auto") sends to the foreground window with
+        pynput via the loop's controller, and to target windows with the platform backend
+        (PostMessage / XSendEvent). A given backend is used for both, as far as its capability flags allow.
+    text: if given, each round types this string instead of pressing the selected keys. It is
+        segmented once per backend (prepare_text) and emitted chunk by chunk to every target, paced on
+        the loop's own thread.
+    max_cps: text mode ceiling in characters per second per target; each backend's own max_rate also applies.
+    overrun_sec: rounds whose sending takes longer than this are counted in stats["overrun_rounds"].
+    first_delay: postpones the first round (resuming a paused or restarted loop on its old cadence).
+    stats: a dict the loop keeps up to date so other threads can read progress without locking.
+        Counters (rounds, skipped_rounds, keys_sent, chars_sent, overrun_rounds) accumulate across
+        calls, so a resumed run keeps them and a fresh run starts from an empty dict.
+        heartbeat/phase/last_round_at (clock time) are what engine_supervisor watches; last_error is
+        set if the loop dies; first_key_at is the time.perf_counter() of the first key actually sent
+        (start-latency measurement); text mode adds last_round_chars and last_round_cps.
+    clock: provides now() and the interval wait (default engine_clock.REAL_CLOCK).
+    window_finder(target_exe, all_windows): replaces the platform window lookup. With a VirtualClock
+        and output_backends.RecordingBackend it lets a long schedule run in milliseconds.
+    """
+    backend: OutputBackend | None = None
+    text: str | None = None
+    max_cps: float | None = None
+    overrun_sec: float | None = None
+    first_delay: float = 0.0
+    stats: dict | None = None
+    clock: object = None
+    window_finder: object = None
 
 
 def run_repeat_loop(
@@ -19,62 +59,261 @@ def run_repeat_loop(
     stop_event: threading.Event,
     target_exe_getter=None,
     log_func=None,
+    target_all_windows_getter=None,
+    options: LoopOptions | None = None,
 ) -> None:
     """
     Run in a thread. Press each selected key in order every interval_sec until stop_event is set.
-    If target_exe_getter returns a non-empty path (Windows only), keys are sent directly to that
-    app's window via PostMessage. Otherwise keys are sent to the foreground window.
-    If log_func is set, it will be called with log messages (str) for debugging.
+    selected_keys_getter returns key codes (see keycodes); a whole round goes out in one send_many call.
+    If target_exe_getter returns a non-empty path (several may be separated by os.pathsep) and the
+    backend supports targeting, keys are sent directly to that app's window, otherwise to the foreground
+    window. If target_all_windows_getter returns True every matching window gets the keys, in parallel
+    if the backend allows it (parallel_targets), otherwise in one send_to_windows call.
+    log_func(msg), if set, receives debug messages. If tracing is enabled (trace_events.enable_tracing)
+    when the loop starts, each round records spans for target lookup, sends, logging and the wait.
+    options (LoopOptions) holds the backend, text mode, clock and stats settings.
     """
+    options = options or LoopOptions()
+    backend, text, max_cps, overrun_sec = options.backend, options.text, options.max_cps, options.overrun_sec
+    tracer = get_tracer()
+    clock = options.clock or REAL_CLOCK
+    find_windows = options.window_finder or get_target_windows
+    if backend is None:
+        foreground_backend = PynputBackend(controller)
+        target_backend = get_platform_target_backend()
+    else:
+        foreground_backend = backend if backend.supports_foreground else None
+        target_backend = backend if backend.supports_targeting else None
+    stats = options.stats if options.stats is not None else {}
+    for counter in ("rounds", "skipped_rounds", "keys_sent", "chars_sent", "overrun_rounds"):
+        stats.setdefault(counter, 0)
+    stats.setdefault("started_at", clock.now())
+    stats.setdefault("last_round_at", None)
+    stats.update(heartbeat=clock.now(), phase="starting", last_error=None)
+    stats.setdefault("first_key_at", None)
+
     def _log(msg):
         if log_func:
+            t0 = tracer.now() if tracer else 0
             try:
                 log_func(msg)
             except Exception:
                 pass
+            if tracer:
+                tracer.complete("log", "engine", t0)
+
+    def _wait(timeout=interval_sec):
+        t0 = tracer.now() if tracer else 0
+        stats["phase"] = "wait"
+        stats["heartbeat"] = clock.now()
+        clock.wait(stop_event, timeout)
+        stats["heartbeat"] = clock.now()
+        if tracer:
+            tracer.complete("wait", "engine", t0)
+
+    def _get_pool():
+        nonlocal pool
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=MAX_SEND_WORKERS, thread_name_prefix="repeat-send")
+        return pool
+
+    def _type_chunk(out, chunk, target):
+        """One chunk to one target (None = focused window). Returns chars typed, or None if it failed."""
+        try:
+            return out.type_text(chunk, target)
+        except Exception as e:
+            where = f" to window 0x{target:X}" if target is not None else ""
+            _log(f"Exception typing text via {out.name}{where}: {e}")
+            return None
 
+    def _text_plan(out):
+        """(chunks, chars/s ceiling) for one backend: segmented for it, paced to the lower of max_cps and its max_rate."""
+        if out is None or not out.supports_text:
+            return None, None
+        limits = [r for r in (max_cps, out.max_rate) if r]
+        cps_limit = min(limits) if limits else None
+        chunk_chars = max(1, min(TEXT_CHUNK_CHARS, int(cps_limit * TEXT_PACE_SEC))) if cps_limit else TEXT_CHUNK_CHARS
+        _log(f"text mode via {out.name}: {len(text)} chars, chunks of {chunk_chars}, ceiling={cps_limit or 'none'} chars/s")
+        return out.prepare_text(text, chunk_chars), cps_limit
+
+    def _type_text(out, plan, targets):
+        """
+        Type a backend's pre-segmented chunks to every target, pacing to its ceiling (per target). Chunk k
+        goes to all targets (in parallel if the backend allows it), then this thread waits once, so pacing
+        never runs on the send workers. A target that fails is dropped for the rest of the round.
+        Returns (chars typed over all targets, seconds spent pacing).
+        """
+        chunks, cps_limit = plan
+        if chunks is None:
+            if loop_count % 10 == 0:
+                _log(f"backend '{out.name}' cannot type text, skipping")
+            return 0, 0.0
+        t0 = tracer.now() if tracer else 0
+        typed, progress, paced = 0, 0, 0.0
+        targets = list(targets)
+        start = clock.now()
+        for chunk in chunks:
+            if stop_event.is_set() or not targets:
+                break
+            if len(targets) > 1 and out.parallel_targets:
+                counts = list(_get_pool().map(lambda w: _type_chunk(out, chunk, w), targets))
+            else:
+                counts = [_type_chunk(out, chunk, w) for w in targets]
+            targets = [w for w, n in zip(targets, counts) if n is not None]
+            counts = [n for n in counts if n is not None]
+            typed += sum(counts)
+            progress += max(counts, default=0)
+            stats["heartbeat"] = now = clock.now()
+            if cps_limit:
+                ahead = progress / cps_limit - (now - start)
+                if ahead > 0:
+                    clock.wait(stop_event, ahead)
+                    paced += ahead
+                    stats["heartbeat"] = clock.now()
+        if tracer:
+            tracer.complete("type_text", "engine", t0, {"backend": out.name, "chars": typed, "targets": len(targets)})
+        return typed, paced
+
+    def _send_to_window(win, keys):
+        """Key mode: one round to one window. Returns the number of keys sent."""
+        t0 = tracer.now() if tracer else 0
+        sent = 0
+        try:
+            sent = target_backend.send_many(keys, win)
+            if log_func and sent < len(keys):
+                _log(f"send to window 0x{win:X}: {len(keys) - sent} of {len(keys)} keys unknown")
+        except Exception as e:
+            _log(f"Exception sending to window 0x{win:X}: {e}")
+        if tracer:
+            tracer.complete("send_window", "engine", t0, {"window": win, "keys": len(keys)})
+        return sent
+
+    def _send_to_windows(windows, keys):
+        """
+        Key mode: one round to every window. Returns keys sent per window. Several windows go through
+        the send pool if the backend allows it (parallel_targets), otherwise in one send_to_windows call.
+        """
+        if len(windows) == 1:
+            return [_send_to_window(windows[0], keys)]
+        if target_backend.parallel_targets:
+            return list(_get_pool().map(lambda w: _send_to_window(w, keys), windows))
+        t0 = tracer.now() if tracer else 0
+        try:
+            results = target_backend.send_to_windows(keys, windows)
+        except Exception as e:
+            _log(f"Exception sending to windows {['0x%X' % w for w in windows]}: {e}")
+            results = [0] * len(windows)
+        if tracer:
+            tracer.complete("send_windows", "engine", t0, {"windows": len(windows), "keys": len(keys)})
+        return results
+
+    pool = None
     try:
-        use_target_hwnd = sys.platform == "win32"
+        use_target_window = target_backend is not None
         keys_list = list(selected_keys_getter())
-        _log(f"Repeat started: interval_sec={interval_sec}, platform={sys.platform}, use_target_hwnd={use_target_hwnd}, selected_keys={keys_list}")
+        _log(f"Repeat started: interval_sec={interval_sec}, platform={sys.platform}, use_target_window={use_target_window}, "
+             f"backend={backend.name if backend is not None else 'auto'}, selected_keys={[KEY_NAMES[c] for c in keys_list]}")
+        out = foreground_backend or target_backend
+        text_plans = None
+        if text:
+            # (foreground, target-window) (chunks, ceiling); in auto mode these are two backends with their own limits.
+            foreground_plan = _text_plan(foreground_backend)
+            target_plan = foreground_plan if target_backend is foreground_backend else _text_plan(target_backend)
+            text_plans = (foreground_plan, target_plan)
+        elif out is not None and out.max_rate and keys_list and len(keys_list) / interval_sec > out.max_rate:
+            _log(f"warning: {len(keys_list) / interval_sec:.0f} keys/s exceeds what backend '{out.name}' sustains ({out.max_rate}/s)")
 
+        if options.first_delay > 0:
+            _wait(options.first_delay)
         loop_count = 0
         while not stop_event.is_set():
+            t_round = tracer.now() if tracer else 0
+            round_start = clock.now()
+            stats["phase"] = "send"
+            stats["heartbeat"] = round_start
             target_exe = (target_exe_getter() or "").strip() if target_exe_getter else ""
-            hwnd = None
-            if use_target_hwnd and target_exe:
+            windows = []
+            if use_target_window and target_exe:
+                all_windows = bool(target_all_windows_getter()) if target_all_windows_getter else False
+                t0 = tracer.now() if tracer else 0
                 try:
-                    hwnd = get_hwnd_for_exe(target_exe)
+                    windows = find_windows(target_exe, all_windows)
                 except Exception as e:
-                    _log(f"get_hwnd_for_exe error: {e}")
-                if not hwnd:
+                    _log(f"window lookup error: {e}")
+                if tracer:
+                    tracer.complete("target_lookup", "engine", t0, {"found": len(windows)})
+                if not windows:
                     if loop_count % 10 == 0:
-                        _log(f"target_exe='{target_exe}' -> hwnd not found (no visible window?), skipping this round")
-                    stop_event.wait(timeout=interval_sec)
+                        _log(f"target_exe='{target_exe}' -> window not found (no visible window?), skipping this round")
+                    _wait()
                     loop_count += 1
+                    stats["skipped_rounds"] += 1
+                    stats["last_round_at"] = clock.now()
+                    if tracer:
+                        tracer.complete("round", "engine", t_round, {"n": loop_count, "skipped": True})
                     continue
                 if loop_count % 10 == 0:
-                    _log(f"target_exe='{target_exe}' -> hwnd=0x{hwnd:X}, sending via PostMessage")
+                    _log(f"target_exe='{target_exe}' -> windows={['0x%X' % w for w in windows]}, sending directly")
+            elif foreground_backend is None:
+                if loop_count % 10 == 0:
+                    _log(f"backend '{backend.name}' only sends to target windows and no target app is set, skipping this round")
+                _wait()
+                loop_count += 1
+                stats["skipped_rounds"] += 1
+                stats["last_round_at"] = clock.now()
+                if tracer:
+                    tracer.complete("round", "engine", t_round, {"n": loop_count, "skipped": True})
+                continue
             else:
                 if loop_count % 10 == 0:
-                    _log(f"mode=foreground (target_exe empty or non-Windows), sending via pynput")
-            for key_id in list(selected_keys_getter()):
-                if stop_event.is_set():
-                    break
+                    _log(f"mode=foreground (target_exe empty or not supported by backend), sending via {foreground_backend.name}")
+            keys = list(selected_keys_getter()) if text_plans is None else ()
+            paced = 0.0
+            if windows and text_plans is not None:
+                chars, paced = _type_text(target_backend, text_plans[1], windows)
+                if chars and stats["first_key_at"] is None:
+                    stats["first_key_at"] = time.perf_counter()
+            elif windows:
+                stats["keys_sent"] += sum(_send_to_windows(windows, keys))
+                if stats["first_key_at"] is None:
+                    stats["first_key_at"] = time.perf_counter()
+            elif text_plans is not None:
+                chars, paced = _type_text(foreground_backend, text_plans[0], (None,))
+                if chars and stats["first_key_at"] is None:
+                    stats["first_key_at"] = time.perf_counter()
+            elif keys:
+                t0 = tracer.now() if tracer else 0
                 try:
-                    if hwnd is not None and _send_key_to_hwnd:
-                        ok = _send_key_to_hwnd(hwnd, key_id)
-                        if log_func and not ok:
-                            _log(f"send_key_to_hwnd failed for key_id='{key_id}'")
-                    else:
-                        k = key_id_to_press(key_id)
-                        controller.press(k)
-                        controller.release(k)
+                    stats["keys_sent"] += foreground_backend.send_many(keys)
+                    if stats["first_key_at"] is None:
+                        stats["first_key_at"] = time.perf_counter()
                 except Exception as e:
-                    _log(f"Exception sending key '{key_id}': {e}")
-            stop_event.wait(timeout=interval_sec)
+                    _log(f"Exception sending keys {[KEY_NAMES[c] for c in keys]} via {foreground_backend.name}: {e}")
+                if tracer:
+                    tracer.complete("send_many", "engine", t0, {"backend": foreground_backend.name, "keys": len(keys)})
+            stats["rounds"] += 1
+            stats["last_round_at"] = now = clock.now()
+            stats["last_round_busy_sec"] = busy = now - round_start - paced
+            if text_plans is not None:
+                stats["chars_sent"] += chars
+                stats["last_round_chars"] = chars
+                stats["last_round_cps"] = round(chars / (now - round_start), 1) if now > round_start else None
+                if loop_count % 10 == 0:
+                    _log(f"typed {chars} chars in {now - round_start:.3f}s ({stats['last_round_cps']} chars/s)")
+            if overrun_sec is not None and busy > overrun_sec:
+                stats["overrun_rounds"] += 1
+                _log(f"round {loop_count + 1} overran: sending took {busy:.3f}s (threshold {overrun_sec}s)")
+            _wait()
             loop_count += 1
             _log(f"round {loop_count}")
+            if tracer:
+                tracer.complete("round", "engine", t_round, {"n": loop_count})
+        stats["phase"] = "stopped"
         _log("Repeat stopped")
     except Exception as e:
+        stats["phase"] = "error"
+        stats["last_error"] = f"{type(e).__name__}: {e}"
         _log(f"Repeat loop error (e.g. app closed): {e}")
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Fast-forward simulation of run_repeat_loop: virtual clock plus recording backend -> exact event timeline."""
+import threading
+
+from engine_clock import VirtualClock
+from keycodes import names_to_codes
+from output_backends import RecordingBackend
+from repeater_engine import LoopOptions, run_repeat_loop
+
+
+class Simulation:
+    """
+    Drive run_repeat_loop against a VirtualClock with an output_backends.RecordingBackend. Keys are
+    given and recorded by name (the engine itself runs on key codes). Keys sent to the foreground are
+    recorded as press/release pairs; keys sent to target windows as ("send", key_name, window). Schedule changes
+    with at() / set_selection_at() / set_windows_at(), then run(duration_sec) returns the timeline.
+    With text, each round types the text instead (recorded as "type" chunks); stats holds the loop's counters.
+
+    Example: 12 hours at 11 s with the target window closed for an hour:
+        sim = Simulation(["a", "b"], 11, target_exe="game.exe", windows=[0x10])
+        sim.set_windows_at(3600, [])
+        sim.set_windows_at(7200, [0x10])
+        timeline = sim.run(12 * 3600)
+    """
+
+    def __init__(self, selected_keys, interval_sec: float, target_exe: str = "", windows=None, all_windows: bool = False,
+                 text: str | None = None, max_cps: float | None = None):
+        self.clock = VirtualClock()
+        self.timeline = []
+        self.backend = RecordingBackend(self.clock, self.timeline)
+        self.selected_keys = names_to_codes(selected_keys)
+        self.interval_sec = interval_sec
+        self.target_exe = target_exe
+        self.windows = list(windows or [])
+        self.all_windows = all_windows
+        self.text = text
+        self.max_cps = max_cps
+        self.stats = {}
+        self.stop_event = threading.Event()
+        self.log = []
+
+    def at(self, when: float, action) -> None:
+        """Run action() at virtual time when (seconds since start)."""
+        self.clock.call_at(when, action)
+
+    def set_selection_at(self, when: float, keys) -> None:
+        codes = names_to_codes(keys)
+        self.at(when, lambda: setattr(self, "selected_keys", codes))
+
+    def set_windows_at(self, when: float, windows) -> None:
+        """Change which target windows exist from time when on (empty list = target missing)."""
+        self.at(when, lambda: setattr(self, "windows", list(windows)))
+
+    def _find_windows(self, target_exe, all_windows):
+        return list(self.windows) if all_windows else self.windows[:1]
+
+    def run(self, duration_sec: float) -> list:
+        """Simulate until duration_sec of virtual time has passed; return the (time, action, key, target) timeline."""
+        self.clock.call_at(duration_sec, self.stop_event.set)
+        run_repeat_loop(
+            None,
+            lambda: self.selected_keys,
+            self.interval_sec,
+            self.stop_event,
+            target_exe_getter=lambda: self.target_exe,
+            log_func=lambda msg: self.log.append((self.clock.now(), msg)),
+            target_all_windows_getter=lambda: self.all_windows,
+            options=LoopOptions(backend=self.backend, text=self.text, max_cps=self.max_cps, stats=self.stats,
+                                clock=self.clock, window_finder=self._find_windows),
+        )
+        return self.timeline
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Single-instance lock and launch-argument handoff to an already running instance (via the control API)."""
+import os
+import sys
+import time
+
+from config_io import get_default_config_path, resolve_profile_path
+from control_server import ControlClient
+
+# How long a second launch waits for an instance that holds the lock but is still starting up.
+HANDOFF_WAIT_SEC = 5.0
+
+
+def get_lock_path() -> str:
+    return os.path.join(os.path.dirname(get_default_config_path()), "instance.lock")
+
+
+class InstanceLock:
+    """Exclusive, non-blocking lock on a file in the config folder; released on release() or process exit."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or get_lock_path()
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Return True if this process now holds the lock, False if another process does."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+b")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        f.close()
+
+
+def launch_commands(profile: str | None = None, start: bool = False, stop: bool = False) -> list[dict]:
+    """Turn launch arguments into control-API requests for the running instance (order matters)."""
+    commands = []
+    if profile:
+        # Resolve here: the running instance has a different working directory.
+        commands.append({"cmd": "load_profile", "path": resolve_profile_path(profile)})
+    if stop:
+        commands.append({"cmd": "stop"})
+    elif start:
+        commands.append({"cmd": "start"})
+    if not commands:
+        commands.append({"cmd": "show"})
+    return commands
+
+
+def forward_to_running_instance(commands: list[dict], address=None, timeout: float = 1.0,
+                                token_path: str | None = None) -> list[dict] | None:
+    """
+    Send commands to this user's running instance. Returns the list of replies, or None if there is
+    none (caller should start the app). A refused/missing socket is detected immediately. A peer that
+    cannot prove it knows this user's control token (another user's instance, an unrelated program),
+    or that times out, hangs up or answers with something other than control-API replies, is not our
+    instance either: None as well, so the launch falls through to the per-user instance lock.
+    """
+    try:
+        client = ControlClient(address, timeout, token_path)  # does the handshake
+    except (OSError, ValueError):
+        return None
+    try:
+        with client:
+            replies = [client.request(**cmd) for cmd in commands]
+    except (OSError, ValueError):  # TimeoutError/ConnectionError are OSErrors, JSONDecodeError a ValueError
+        return None
+    if not all(isinstance(r, dict) for r in replies):
+        return None
+    return replies
+
+
+def acquire_or_forward(commands: list[dict], lock: InstanceLock | None = None, address=None,
+                       token_path: str | None = None):
+    """
+    Either hand commands off to the running instance or take the single-instance lock.
+    Returns (lock, None) when this process should start the app, or (None, replies) after a handoff.
+    If another process holds the lock but is not answering yet (still starting), retry until
+    HANDOFF_WAIT_SEC; raises RuntimeError if it never answers.
+    """
+    replies = forward_to_running_instance(commands, address, token_path=token_path)
+    if replies is not None:
+        return None, replies
+    lock = lock or InstanceLock()
+    if lock.acquire():
+        return lock, None
+    deadline = time.monotonic() + HANDOFF_WAIT_SEC
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        replies = forward_to_running_instance(commands, address, token_path=token_path)
+        if replies is not None:
+            return None, replies
+        if lock.acquire():  # the other instance exited meanwhile
+            return lock, None
+    raise RuntimeError("Another Keyboard Repeater instance holds the lock but does not answer on the control socket.")
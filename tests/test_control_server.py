@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Control API: request decoding, and the token handshake that keeps other users and web pages out."""
+import json
+import os
+import socket
+
+import pytest
+
+from control_server import ControlClient, ControlServer, send_command
+
+
+@pytest.fixture
+def server(tmp_path):
+    calls = []
+    srv = ControlServer({"start": lambda req: calls.append("start") or {"accepted": True},
+                         "boom": lambda req: 1 / 0},
+                        ("127.0.0.1", 0), str(tmp_path / "control.token"))
+    srv.start()
+    srv.address = srv._sock.getsockname()
+    srv.calls = calls
+    yield srv
+    srv.stop()
+
+
+def _raw_exchange(address, payload: bytes) -> list[dict]:
+    """Send raw bytes, read until the server closes the connection; return the decoded reply lines."""
+    with socket.create_connection(address, timeout=2.0) as s:
+        s.sendall(payload)
+        data = b""
+        while True:
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("line, error", [
+    (b"not json", "bad request"),
+    (b"[1, 2]", "bad request: request must be a JSON object"),
+    (b'{"cmd": "nope"}', "unknown command: 'nope'"),
+    (b'{"cmd": "boom"}', "division by zero"),
+])
+def test_handle_line_error_replies(server, line, error):
+    reply = server.handle_line(line)
+    assert reply["ok"] is False
+    assert reply["error"].startswith(error)
+
+
+def test_handle_line_echoes_id(server):
+    assert server.handle_line(b'{"cmd": "start", "id": 7}') == {"ok": True, "accepted": True, "id": 7}
+    assert server.handle_line(b'{"cmd": "nope", "id": "x"}')["id"] == "x"
+
+
+def test_browser_post_is_rejected_and_body_never_read(server):
+    body = b'{"cmd":"start"}'
+    request = (b"POST / HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: text/plain\r\n"
+               b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    replies = _raw_exchange(server.address, request)
+    assert len(replies) == 1 and replies[0]["ok"] is False
+    assert server.calls == []
+
+
+def test_command_without_handshake_is_unauthorized(server):
+    replies = _raw_exchange(server.address, b'{"cmd":"start"}\n{"cmd":"start"}\n')
+    assert replies == [{"ok": False, "error": "unauthorized"}]
+    assert server.calls == []
+
+
+def test_client_with_token_can_send_commands(server):
+    with ControlClient(server.address, 2.0, server.token_path) as client:
+        assert client.request("start") == {"ok": True, "accepted": True}
+        assert client.request("nope")["ok"] is False  # errors after the handshake keep the connection
+        assert client.request("start")["ok"] is True
+    assert server.calls == ["start", "start"]
+
+
+def test_wrong_or_missing_token_is_refused(server, tmp_path):
+    other = tmp_path / "other.token"
+    other.write_text("0" * 64)
+    with pytest.raises(PermissionError):
+        ControlClient(server.address, 2.0, str(other))
+    with pytest.raises(PermissionError):
+        send_command("start", server.address, 2.0, str(tmp_path / "missing.token"))
+    assert server.calls == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_token_file_is_user_only_and_removed_on_stop(server):
+    assert os.stat(server.token_path).st_mode & 0o077 == 0
+    server.stop()
+    assert not os.path.exists(server.token_path)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Supervisor restart / give-up, stall recording and pause/resume cadence on real threads with short intervals."""
+import time
+
+import pytest
+
+from engine_clock import REAL_CLOCK
+from engine_supervisor import (FAILED, MAX_RESTARTS, PAUSED, RESTARTING, RUNNING, STALLED, STOPPED,
+                               EngineSupervisor)
+from keycodes import code_for_name
+from output_backends import NullBackend, RecordingBackend
+from repeater_engine import LoopOptions
+
+KEY_A = code_for_name("a")
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def supervisor():
+    states = []
+    sup = EngineSupervisor(on_state_change=states.append, stall_threshold_sec=0.2)
+    sup.states = states
+    yield sup
+    sup.stop()
+    sup.engine.shutdown()
+
+
+def test_loop_that_dies_once_is_restarted_and_keeps_sending(supervisor):
+    calls = []
+
+    def keys():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return (KEY_A,)
+
+    backend = NullBackend()
+    supervisor.start(None, keys, 0.05, options=LoopOptions(backend=backend))
+    assert _wait_for(lambda: backend.keys >= 3)
+    assert supervisor.state == RUNNING
+    assert supervisor.metrics["restarts"] == 1
+    assert supervisor.metrics["last_error"] == "RuntimeError: boom"
+    assert supervisor.states[:3] == [RUNNING, RESTARTING, RUNNING]
+
+
+def test_loop_that_always_dies_is_given_up_as_failed(supervisor):
+    def keys():
+        raise RuntimeError("boom")
+
+    supervisor.start(None, keys, 0.05, options=LoopOptions(backend=NullBackend()))
+    assert _wait_for(lambda: supervisor.state == FAILED)
+    assert supervisor.metrics["restarts"] == MAX_RESTARTS
+    assert not supervisor.is_active()
+    assert supervisor.states.count(RESTARTING) == MAX_RESTARTS
+
+
+class _BlockOnceBackend(NullBackend):
+    """The first send blocks for block_sec (a hung driver call); later sends return at once."""
+
+    def __init__(self, block_sec):
+        super().__init__()
+        self.block_sec = block_sec
+
+    def send_many(self, events, target=None) -> int:
+        if self.calls == 0:
+            time.sleep(self.block_sec)
+        return super().send_many(events, target)
+
+
+def test_blocked_send_is_reported_stalled_and_its_duration_recorded(supervisor):
+    supervisor.start(None, lambda: (KEY_A,), 5.0, options=LoopOptions(backend=_BlockOnceBackend(1.0)))
+    assert _wait_for(lambda: supervisor.metrics["stalls"] == 1)
+    assert supervisor.state == STALLED
+    assert _wait_for(lambda: supervisor.metrics["stall_durations"])
+    assert supervisor.state == RUNNING
+    (duration,) = supervisor.metrics["stall_durations"]
+    assert 0.8 <= duration <= 1.5
+    assert supervisor.metrics["max_stall_sec"] == pytest.approx(duration, abs=0.001)
+    assert supervisor.stats["overrun_rounds"] == 1
+
+
+def test_resume_keeps_the_cadence_and_the_counters(supervisor):
+    timeline = []
+    supervisor.start(None, lambda: (KEY_A,), 0.3, options=LoopOptions(backend=RecordingBackend(REAL_CLOCK, timeline)))
+    assert _wait_for(lambda: len(timeline) == 2)  # press + release of the first round
+    supervisor.pause()
+    assert supervisor.state == PAUSED
+    time.sleep(0.05)
+    supervisor.resume()
+    assert _wait_for(lambda: len(timeline) == 4)
+    # The resumed round comes one interval after the last one, not right at resume().
+    assert 0.28 <= timeline[2][0] - timeline[0][0] <= 0.45
+    assert supervisor.stats["rounds"] == 2
+
+    # Paused for longer than the interval: the next round is due, so it goes out at once.
+    supervisor.pause()
+    time.sleep(0.4)
+    resumed_at = REAL_CLOCK.now()
+    supervisor.resume()
+    assert _wait_for(lambda: len(timeline) == 6)
+    assert timeline[4][0] - resumed_at < 0.1
+    assert supervisor.stats["rounds"] == 3
+    assert supervisor.metrics["restarts"] == 0
+
+
+def test_pause_and_resume_are_ignored_when_not_applicable(supervisor):
+    supervisor.resume()
+    assert supervisor.state == STOPPED
+    supervisor.start(None, lambda: (KEY_A,), 0.3, options=LoopOptions(backend=NullBackend()))
+    supervisor.resume()
+    assert supervisor.state == RUNNING
+    supervisor.stop()
+    supervisor.pause()
+    assert supervisor.state == STOPPED
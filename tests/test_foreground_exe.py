@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""Target app path matching."""
+import os
+import sys
+
+import pytest
+
+from foreground_exe import normalize_exe_path
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="symlinks resolved on Linux/macOS")
+def test_symlinked_exe_matches_proc_exe(tmp_path):
+    real = tmp_path / "python3.11"
+    real.write_text("")
+    link = tmp_path / "python3"
+    os.symlink(real.name, link)
+    # The user browses to the link; /proc/<pid>/exe reports the resolved file.
+    assert normalize_exe_path(f" {link} ") == normalize_exe_path(str(real))
+    assert normalize_exe_path(str(tmp_path / "bin" / ".." / "python3")) == normalize_exe_path(str(real))
+
+
+def test_empty_path():
+    assert normalize_exe_path("") == ""
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Exact emitted-event timelines of the repeat loop on a virtual clock (simulation.Simulation); no Tk or pynput."""
+import threading
+
+import repeater_engine
+from engine_clock import VirtualClock
+from output_backends import RecordingBackend
+from repeater_engine import LoopOptions
+from simulation import Simulation
+
+
+def _round_starts(timeline, target):
+    """Times at which each round began sending to target (first entry after a gap)."""
+    starts = []
+    for t, _, _, win in timeline:
+        if win == target and (not starts or t - starts[-1] >= 5):
+            starts.append(t)
+    return starts
+
+
+def test_window_missing_gap_skips_rounds_and_resumes_on_cadence():
+    sim = Simulation(["a"], 10, target_exe="game", windows=[0x10])
+    sim.set_windows_at(15, [])
+    sim.set_windows_at(35, [0x10])
+    assert sim.run(50) == [
+        (0.0, "send", "a", 0x10),
+        (10.0, "send", "a", 0x10),
+        (40.0, "send", "a", 0x10),
+    ]
+    assert sim.stats["rounds"] == 3
+    assert sim.stats["skipped_rounds"] == 2
+
+
+def test_selection_change_applies_from_next_round():
+    sim = Simulation(["a", "b"], 5)
+    sim.set_selection_at(7, ["c"])
+    assert sim.run(15) == [
+        (0.0, "press", "a", None), (0.0, "release", "a", None),
+        (0.0, "press", "b", None), (0.0, "release", "b", None),
+        (5.0, "press", "a", None), (5.0, "release", "a", None),
+        (5.0, "press", "b", None), (5.0, "release", "b", None),
+        (10.0, "press", "c", None), (10.0, "release", "c", None),
+    ]
+
+
+def test_all_windows_fan_out_in_window_order():
+    sim = Simulation(["a", "b"], 10, target_exe="game", windows=[0x30, 0x10, 0x20], all_windows=True)
+    round_ = [(win, key) for win in (0x30, 0x10, 0x20) for key in ("a", "b")]
+    assert sim.run(15) == [(t, "send", key, win) for t in (0.0, 10.0) for win, key in round_]
+    assert sim.stats["keys_sent"] == 12
+
+
+def test_first_window_only_without_all_windows():
+    sim = Simulation(["a"], 10, target_exe="game", windows=[0x30, 0x10], all_windows=False)
+    assert sim.run(15) == [(0.0, "send", "a", 0x30), (10.0, "send", "a", 0x30)]
+
+
+def test_text_paced_once_per_round_across_windows():
+    # 4 chars at 4 chars/s: one char per chunk, 1 s of typing, then the 10 s interval.
+    sim = Simulation([], 10, target_exe="game", windows=[0x10, 0x20], all_windows=True, text="abcd", max_cps=4)
+    expected = [(start + i * 0.25, "type", ch, win)
+                for start in (0.0, 11.0) for i, ch in enumerate("abcd") for win in (0x10, 0x20)]
+    assert sim.run(15) == expected
+    assert sim.stats["chars_sent"] == 16
+
+
+def test_text_round_cadence_does_not_depend_on_window_count():
+    starts = {}
+    for windows in ([0x10], [0x10, 0x20, 0x30]):
+        sim = Simulation([], 10, target_exe="game", windows=windows, all_windows=True, text="x" * 200, max_cps=100)
+        timeline = sim.run(60)
+        starts[len(windows)] = _round_starts(timeline, 0x10)
+        assert sim.stats["rounds"] == 5
+        assert sim.stats["chars_sent"] == 1000 * len(windows)
+    assert starts[1] == starts[3] == [0.0, 12.0, 24.0, 36.0, 48.0]
+
+
+
+class _SlowRecordingBackend(RecordingBackend):
+    max_rate = 4
+
+
+def test_auto_mode_paces_text_per_backend(monkeypatch):
+    # Auto mode types through two backends; the foreground one's low max_rate must not cap the target windows.
+    clock = VirtualClock()
+    timeline = []
+    monkeypatch.setattr(repeater_engine, "PynputBackend", lambda controller: _SlowRecordingBackend(clock, timeline))
+    monkeypatch.setattr(repeater_engine, "get_platform_target_backend", lambda: RecordingBackend(clock, timeline))
+    target = {"exe": ""}
+    stop_event = threading.Event()
+    clock.call_at(5, lambda: target.update(exe="game"))
+    clock.call_at(15, stop_event.set)
+    repeater_engine.run_repeat_loop(None, lambda: (), 10, stop_event, target_exe_getter=lambda: target["exe"],
+                                    options=LoopOptions(text="abcd", clock=clock,
+                                                        window_finder=lambda exe, all_windows: [0x10]))
+    assert timeline == [(0.0, "type", "a", None), (0.25, "type", "b", None), (0.5, "type", "c", None),
+                        (0.75, "type", "d", None), (11.0, "type", "abcd", 0x10)]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Second-launch handoff: only this user's own, answering instance gets the launch arguments."""
+import socket
+import threading
+
+import pytest
+
+from control_server import ControlServer, _write_token
+from single_instance import InstanceLock, acquire_or_forward, forward_to_running_instance
+
+COMMANDS = [{"cmd": "start"}]
+
+
+@pytest.fixture
+def token_path(tmp_path):
+    path = str(tmp_path / "control.token")
+    _write_token(path, "1" * 64)
+    return path
+
+
+def _listener(reply: bytes | None):
+    """A TCP peer that accepts and then never answers (reply None) or sends reply and hangs up."""
+    srv = socket.create_server(("127.0.0.1", 0))
+    conns = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            conns.append(conn)
+            if reply is not None:
+                conn.recv(4096)
+                conn.sendall(reply)
+                conn.close()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return srv, conns
+
+
+def test_peer_that_never_replies_is_not_our_instance(token_path):
+    srv, conns = _listener(None)
+    try:
+        assert forward_to_running_instance(COMMANDS, srv.getsockname(), 0.2, token_path) is None
+    finally:
+        srv.close()
+        for conn in conns:
+            conn.close()
+
+
+def test_peer_that_replies_non_json_is_not_our_instance(token_path):
+    srv, _ = _listener(b"HTTP/1.0 400 Bad Request\r\n\r\n")
+    try:
+        assert forward_to_running_instance(COMMANDS, srv.getsockname(), 1.0, token_path) is None
+    finally:
+        srv.close()
+
+
+def test_other_users_instance_is_not_ours_and_we_take_our_lock(tmp_path, token_path):
+    # Another user's instance: same kind of server, but its token is in its own config folder.
+    theirs = ControlServer({"start": lambda req: {"accepted": True}}, ("127.0.0.1", 0), str(tmp_path / "theirs.token"))
+    theirs.start()
+    try:
+        assert forward_to_running_instance(COMMANDS, theirs.address, 1.0, token_path) is None
+        lock, replies = acquire_or_forward(COMMANDS, InstanceLock(str(tmp_path / "instance.lock")),
+                                           theirs.address, token_path)
+        assert lock is not None and replies is None
+        lock.release()
+    finally:
+        theirs.stop()
+
+
+def test_own_instance_gets_the_commands(tmp_path):
+    received = []
+    ours = ControlServer({"start": lambda req: received.append(req["cmd"]) or {"accepted": True}},
+                         ("127.0.0.1", 0), str(tmp_path / "control.token"))
+    ours.start()
+    try:
+        lock, replies = acquire_or_forward(COMMANDS, InstanceLock(str(tmp_path / "instance.lock")),
+                                           ours.address, ours.token_path)
+        assert lock is None and replies == [{"ok": True, "accepted": True}]
+        assert received == ["start"]
+    finally:
+        ours.stop()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Tracing on/off keeps the last recording exportable."""
+import json
+
+from trace_events import disable_tracing, enable_tracing, get_last_recording, get_tracer
+
+
+def test_recording_survives_disable_until_next_session(tmp_path):
+    recorder = enable_tracing(capacity=8)
+    recorder.instant("hotkey_start", "hotkey")
+    disable_tracing()
+    assert get_tracer() is None
+    assert get_last_recording() is recorder
+    path = tmp_path / "trace.json"
+    get_last_recording().dump(str(path))
+    names = [ev["name"] for ev in json.loads(path.read_text())["traceEvents"] if ev["ph"] != "M"]
+    assert names == ["hotkey_start"]
+    fresh = enable_tracing(capacity=8)
+    assert fresh is not recorder and get_last_recording() is fresh
+    disable_tracing()
+
+
+def test_ring_buffer_keeps_newest_events():
+    recorder = enable_tracing(capacity=4)
+    for i in range(10):
+        recorder.instant(f"e{i}", "test")
+    disable_tracing()
+    assert [ev[1] for ev in recorder.events()] == ["e6", "e7", "e8", "e9"]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Turbo trigger: autorepeat debounce, and reset() ending a hold in progress."""
+import time
+
+from turbo_mode import TurboTrigger
+
+
+def _trigger(debounce_sec=0.0):
+    calls = []
+    trigger = TurboTrigger(lambda at: calls.append(("hold", at)), lambda at: calls.append(("release", at)),
+                           debounce_sec=debounce_sec)
+    return trigger, calls
+
+
+def test_reset_mid_hold_releases_once():
+    trigger, calls = _trigger()
+    trigger.press(1.0)
+    trigger.press(1.1)  # Windows/macOS autorepeat
+    trigger.reset(2.0)
+    trigger.release(2.5)  # the old key's real release arrives after the change: ignored
+    assert calls == [("hold", 1.0), ("release", 2.0)]
+    assert not trigger.held
+    assert trigger.metrics["last_hold_sec"] == 1.0
+
+
+def test_reset_when_idle_does_nothing():
+    trigger, calls = _trigger()
+    trigger.reset()
+    assert calls == []
+
+
+def test_reset_during_pending_release_releases_once():
+    trigger, calls = _trigger(debounce_sec=0.05)
+    trigger.press(1.0)
+    trigger.release()
+    trigger.reset(2.0)
+    time.sleep(0.15)  # the debounce thread must not release a second time
+    assert calls == [("hold", 1.0), ("release", 2.0)]
+
+
+def test_x11_autorepeat_release_press_pair_is_absorbed():
+    trigger, calls = _trigger(debounce_sec=0.05)
+    trigger.press(1.0)
+    trigger.release()
+    trigger.press()
+    time.sleep(0.1)
+    assert calls == [("hold", 1.0)]
+    assert trigger.held
+    assert trigger.metrics["autorepeat_releases"] == 1
+    trigger.release()
+    time.sleep(0.15)
+    assert [name for name, _ in calls] == ["hold", "release"]
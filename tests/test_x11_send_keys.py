@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+XSendEvent fan-out against real X11 windows. Needs a display, e.g.:
+    xvfb-run -a python -m pytest tests/test_x11_send_keys.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+if not sys.platform.startswith("linux") or not os.environ.get("DISPLAY"):
+    pytest.skip("needs an X11 display (run under xvfb-run)", allow_module_level=True)
+pytest.importorskip("Xlib")
+
+from Xlib import X, display
+
+from engine_clock import VirtualClock
+from keycodes import code_for_name
+from output_backends import X11SendEventBackend
+from repeater_engine import LoopOptions, run_repeat_loop
+
+
+@pytest.fixture
+def windows():
+    """Three mapped windows on a separate connection that selects key events, plus that connection."""
+    d = display.Display()
+    root = d.screen().root
+    wins = []
+    for i in range(3):
+        win = root.create_window(10 + 110 * i, 10, 100, 50, 0, X.CopyFromParent,
+                                 event_mask=X.KeyPressMask | X.KeyReleaseMask)
+        win.map()
+        wins.append(win)
+    d.sync()
+    yield d, wins
+    for win in wins:
+        win.destroy()
+    d.close()
+
+
+def _collect(d, expected, timeout=2.0):
+    got = []
+    deadline = time.monotonic() + timeout
+    while len(got) < expected and time.monotonic() < deadline:
+        while d.pending_events():
+            ev = d.next_event()
+            if ev.type in (X.KeyPress, X.KeyRelease):
+                got.append((ev.window.id, ev.type, ev.detail, ev.send_event))
+        time.sleep(0.005)
+    return got
+
+
+def test_send_to_windows_reaches_every_window_in_order(windows):
+    d, wins = windows
+    backend = X11SendEventBackend()
+    keys = [code_for_name("a"), code_for_name("b")]
+    assert backend.send_to_windows(keys, [w.id for w in wins]) == [2, 2, 2]
+    got = _collect(d, 12)
+    assert len(got) == 12
+    assert [g[0] for g in got] == [w.id for w in wins for _ in range(4)]
+    assert [g[1] for g in got[:4]] == [X.KeyPress, X.KeyRelease, X.KeyPress, X.KeyRelease]
+    assert all(g[3] for g in got)  # synthetic (XSendEvent) events
+
+
+def test_engine_fans_out_one_round_to_all_windows(windows):
+    d, wins = windows
+    clock = VirtualClock()
+    stop_event = threading.Event()
+    clock.call_at(0.5, stop_event.set)
+    run_repeat_loop(None, lambda: [code_for_name("a")], 1.0, stop_event, target_exe_getter=lambda: "x",
+                    target_all_windows_getter=lambda: True,
+                    options=LoopOptions(backend=X11SendEventBackend(), clock=clock,
+                                        window_finder=lambda exe, all_windows: [w.id for w in wins]))
+    got = _collect(d, 6)
+    assert sorted({g[0] for g in got}) == sorted(w.id for w in wins)
+    assert len(got) == 6
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Optional low-overhead tracing: spans in a preallocated ring buffer, exported as Chrome trace-event JSON."""
+import itertools
+import json
+import os
+import threading
+import time
+
+DEFAULT_CAPACITY = 65536
+
+
+class TraceRecorder:
+    """
+    Fixed-size ring buffer of trace events. Recording is lock-free (slot index comes from an
+    itertools counter, which is atomic under the GIL); once full, the oldest events are overwritten.
+    Timestamps are time.perf_counter_ns() values; use now() to start a span and complete() to end it.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self._buf = [None] * self.capacity
+        self._counter = itertools.count()
+        self._thread_names = {}
+        self._pid = os.getpid()
+        self.now = time.perf_counter_ns
+
+    def _put(self, ph, name, cat, ts, dur, args):
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        seq = next(self._counter)
+        self._buf[seq % self.capacity] = (seq, ph, name, cat, ts, dur, tid, args)
+
+    def complete(self, name: str, cat: str, start_ns: int, args: dict | None = None) -> None:
+        """Record a span that started at start_ns (from now()) and ends now."""
+        end = time.perf_counter_ns()
+        self._put("X", name, cat, start_ns, end - start_ns, args)
+
+    def instant(self, name: str, cat: str, args: dict | None = None) -> None:
+        """Record a point-in-time event."""
+        self._put("i", name, cat, time.perf_counter_ns(), 0, args)
+
+    def events(self) -> list:
+        """Return recorded events as (ph, name, cat, ts_ns, dur_ns, tid, args), oldest first."""
+        items = sorted(e for e in list(self._buf) if e is not None)
+        return [e[1:] for e in items]
+
+    def to_chrome_trace(self) -> dict:
+        """Return a dict in Chrome trace-event format (loadable in Perfetto / chrome://tracing)."""
+        trace_events = []
+        for tid, tname in list(self._thread_names.items()):
+            trace_events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid, "args": {"name": tname}})
+        for ph, name, cat, ts, dur, tid, args in self.events():
+            ev = {"ph": ph, "name": name, "cat": cat, "ts": ts / 1000.0, "pid": self._pid, "tid": tid}
+            if ph == "X":
+                ev["dur"] = dur / 1000.0
+            else:
+                ev["s"] = "t"
+            if args:
+                ev["args"] = args
+            trace_events.append(ev)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: str) -> None:
+        """Write the Chrome trace JSON to path."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_tracer = None
+_last_tracer = None  # kept after disable_tracing() so the recording can still be exported
+
+
+def get_tracer() -> TraceRecorder | None:
+    """Return the active recorder, or None when tracing is off (callers check before recording)."""
+    return _tracer
+
+
+def get_last_recording() -> TraceRecorder | None:
+    """Return the active recorder, else the one from the last tracing session (for export), else None."""
+    return _tracer or _last_tracer
+
+
+def enable_tracing(capacity: int = DEFAULT_CAPACITY) -> TraceRecorder:
+    """Turn tracing on (keeps the existing recorder if already on; a new session replaces the last one)."""
+    global _tracer, _last_tracer
+    if _tracer is None:
+        _tracer = _last_tracer = TraceRecorder(capacity)
+    return _tracer
+
+
+def disable_tracing() -> None:
+    """Stop recording. The recorded events stay available through get_last_recording()."""
+    global _tracer
+    _tracer = None
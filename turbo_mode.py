@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Hold-to-repeat (turbo): repeat the selected keys while a trigger key is held, with OS-autorepeat debounce."""
+import sys
+import threading
+import time
+
+# While a key is held the OS repeats it. Windows/macOS repeat the press only; X11 sends a release
+# immediately followed by a press. A release is therefore confirmed only after this long with no
+# new press (this is also the worst-case extra release latency). 0 = act on the release at once.
+TURBO_DEBOUNCE_SEC = 0.025 if sys.platform.startswith("linux") else 0.0
+DEFAULT_TURBO_INTERVAL_MS = 30
+MIN_TURBO_INTERVAL_MS = 5
+
+
+class TurboTrigger:
+    """
+    Press/release state machine for the turbo trigger key, fed from the hotkey listener thread.
+    on_hold(pressed_at) is called on the first real press, on_release(released_at) once the key is really
+    released or the trigger is reset mid-hold; times are time.perf_counter() of the physical event, so
+    the engine's start/stop latency metrics include any debounce. Both callbacks run on the listener thread (or, for a debounced
+    release, on this trigger's own persistent thread) and must not touch Tk.
+    """
+
+    def __init__(self, on_hold, on_release, debounce_sec: float = TURBO_DEBOUNCE_SEC):
+        self.on_hold = on_hold
+        self.on_release = on_release
+        self.debounce_sec = debounce_sec
+        self.held = False
+        self.metrics = {"holds": 0, "autorepeat_presses": 0, "autorepeat_releases": 0,
+                        "last_hold_sec": None}
+        self._held_since = None
+        self._pending_release = None
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def press(self, pressed_at: float | None = None) -> None:
+        pressed_at = pressed_at or time.perf_counter()
+        with self._cond:
+            if self._pending_release is not None:
+                # X11 autorepeat: the release we just saw was synthetic.
+                self._pending_release = None
+                self.metrics["autorepeat_releases"] += 1
+                return
+            if self.held:
+                self.metrics["autorepeat_presses"] += 1
+                return
+            self.held = True
+            self._held_since = pressed_at
+            self.metrics["holds"] += 1
+        self._call(self.on_hold, pressed_at)
+
+    def release(self, released_at: float | None = None) -> None:
+        released_at = released_at or time.perf_counter()
+        with self._cond:
+            if not self.held or self._pending_release is not None:
+                return
+            if self.debounce_sec > 0:
+                self._pending_release = released_at
+                self._ensure_thread()
+                self._cond.notify()
+                return
+            self._finish_hold(released_at)
+        self._call(self.on_release, released_at)
+
+    def reset(self, released_at: float | None = None) -> None:
+        """
+        Forget the held state (e.g. when the trigger key changes). A hold in progress ends with
+        on_release, so its repeat job stops: the new key's release would never reach this trigger.
+        """
+        released_at = released_at or time.perf_counter()
+        with self._cond:
+            if not self.held:
+                return
+            self._pending_release = None
+            self._finish_hold(released_at)
+        self._call(self.on_release, released_at)
+
+    def _finish_hold(self, released_at):
+        self.held = False
+        self.metrics["last_hold_sec"] = round(released_at - self._held_since, 3)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._debounce_loop, name="turbo-debounce", daemon=True)
+            self._thread.start()
+
+    def _debounce_loop(self):
+        while True:
+            with self._cond:
+                while self._pending_release is None:
+                    self._cond.wait()
+                released_at = self._pending_release
+                remaining = released_at + self.debounce_sec - time.perf_counter()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue  # re-check: a press may have cancelled it
+                self._pending_release = None
+                self._finish_hold(released_at)
+            self._call(self.on_release, released_at)
+
+    @staticmethod
+    def _call(func, at):
+        try:
+            func(at)
+        except Exception:
+            pass
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 """Build keyboard repeater UI; attach widgets/vars to app."""
+import os
 import re
 import sys
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, messagebox
 
-from layout import MAIN_LAYOUT, NUMPAD_LAYOUT
+from keycodes import key_name
+from keyboard_canvas import KeyboardCanvas
+from layout import DEFAULT_KEYBOARD_LAYOUT, KEYBOARD_LAYOUTS
+from output_backends import AUTO_BACKEND, available_backends
+from turbo_mode import DEFAULT_TURBO_INTERVAL_MS
 
 
 def _validate_interval_input(proposed: str) -> bool:
@@ -16,34 +21,25 @@ def _validate_interval_input(proposed: str) -> bool:
 
 
 def build_ui(root, app):
-    """Build all UI; set app.key_buttons, app.interval_var, app.unit_var, app.unit_combo,
-    app.start_hotkey_btn, app.stop_hotkey_btn, app.status_var, app.status_label, app.size_hint_var."""
+    """Build all UI; set app.keyboard, app.keyboard_layout_var, app.interval_var, app.unit_var, app.unit_combo,
+    app.backend_var, app.text_mode_var, app.text_var, app.text_cps_var, app.start_hotkey_btn, app.stop_hotkey_btn, app.turbo_key_btn, app.turbo_interval_var,
+    app.status_var, app.status_label, app.size_hint_var."""
     main = ttk.Frame(root, padding=(6, 6, 6, 2))
     main.pack(fill=tk.BOTH, expand=True)
 
-    ttk.Label(main, text="Click keys to repeat (multi-select):", font=("Segoe UI", 10)).pack(anchor=tk.W)
-    key_frame = ttk.Frame(main)
-    key_frame.pack(fill=tk.X, pady=(2, 6))
-
-    main_kb = ttk.Frame(key_frame)
-    main_kb.pack(side=tk.LEFT, fill=tk.X, expand=True)
-    for indent_px, row_keys in MAIN_LAYOUT:
-        row_f = ttk.Frame(main_kb)
-        row_f.pack(fill=tk.X, pady=1)
-        if indent_px > 0:
-            spacer = ttk.Frame(row_f, width=indent_px)
-            spacer.pack(side=tk.LEFT)
-            spacer.pack_propagate(False)
-        for item in row_keys:
-            _add_key_button(row_f, item, app)
-
-    numpad_f = ttk.Frame(key_frame)
-    numpad_f.pack(side=tk.RIGHT, padx=(12, 0))
-    for row_keys in NUMPAD_LAYOUT:
-        row_f = ttk.Frame(numpad_f)
-        row_f.pack(fill=tk.X, pady=1)
-        for item in row_keys:
-            _add_key_button(row_f, item, app)
+    header = ttk.Frame(main)
+    header.pack(fill=tk.X)
+    ttk.Label(header, text="Click keys to repeat (multi-select):", font=("Segoe UI", 10)).pack(side=tk.LEFT)
+    app.keyboard_layout_var = tk.StringVar(value=DEFAULT_KEYBOARD_LAYOUT)
+    layout_combo = ttk.Combobox(
+        header, textvariable=app.keyboard_layout_var,
+        values=list(KEYBOARD_LAYOUTS), state="readonly", width=8
+    )
+    layout_combo.pack(side=tk.RIGHT, padx=2)
+    layout_combo.bind("<<ComboboxSelected>>", lambda e: app._set_keyboard_layout(app.keyboard_layout_var.get()))
+    ttk.Label(header, text="Layout:").pack(side=tk.RIGHT, padx=(0, 4))
+    app.keyboard = KeyboardCanvas(main, KEYBOARD_LAYOUTS[DEFAULT_KEYBOARD_LAYOUT], app._toggle_key)
+    app.keyboard.canvas.pack(anchor=tk.W, pady=(2, 6))
 
     interval_frame = ttk.Frame(main)
     interval_frame.pack(fill=tk.X, pady=4)
@@ -61,8 +57,14 @@ def build_ui(root, app):
         values=["Seconds", "Minutes"], state="readonly", width=10
     )
     app.unit_combo.pack(side=tk.LEFT, padx=2)
-
-    if sys.platform == "win32":
+    ttk.Label(interval_frame, text="Output:", anchor=tk.W).pack(side=tk.LEFT, padx=(16, 4))
+    app.backend_var = tk.StringVar(value=AUTO_BACKEND)
+    ttk.Combobox(
+        interval_frame, textvariable=app.backend_var,
+        values=available_backends(), state="readonly", width=8
+    ).pack(side=tk.LEFT, padx=2)
+
+    if sys.platform == "win32" or sys.platform.startswith("linux"):
         target_frame = ttk.Frame(main)
         target_frame.pack(fill=tk.X, pady=4)
         ttk.Label(target_frame, text="Target app (optional):", width=18, anchor=tk.W).pack(side=tk.LEFT, padx=(0, 4))
@@ -72,20 +74,36 @@ def build_ui(root, app):
         )
         target_entry.pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
         _add_browse_button(target_frame, app, root)
+        app.target_all_windows_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(target_frame, text="All windows", variable=app.target_all_windows_var).pack(side=tk.LEFT, padx=(4, 0))
+
+    text_frame = ttk.Frame(main)
+    text_frame.pack(fill=tk.X, pady=4)
+    app.text_mode_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(text_frame, text="Type text:", variable=app.text_mode_var, width=10).pack(side=tk.LEFT, padx=(0, 4))
+    app.text_var = tk.StringVar(value="")
+    ttk.Entry(text_frame, textvariable=app.text_var, width=45).pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
+    ttk.Label(text_frame, text="max", anchor=tk.W).pack(side=tk.LEFT, padx=(8, 4))
+    app.text_cps_var = tk.StringVar(value="0")
+    ttk.Entry(
+        text_frame, textvariable=app.text_cps_var, width=6,
+        validate="key", validatecommand=vcmd
+    ).pack(side=tk.LEFT, padx=2)
+    ttk.Label(text_frame, text="chars/s (0 = no limit)", anchor=tk.W).pack(side=tk.LEFT, padx=2)
 
     hotkey_frame = ttk.Frame(main)
     hotkey_frame.pack(fill=tk.X, pady=4)
     ttk.Label(hotkey_frame, text="Start hotkey:", width=10, anchor=tk.W).pack(side=tk.LEFT, padx=(0, 4))
-    app.start_hotkey_var = tk.StringVar(value=app.start_hotkey.upper())
+    app.start_hotkey_var = tk.StringVar(value=key_name(app.start_hotkey).upper())
     app.start_hotkey_btn = ttk.Button(
-        hotkey_frame, text=app.start_hotkey.upper(), width=8,
+        hotkey_frame, text=key_name(app.start_hotkey).upper(), width=8,
         command=lambda: app._begin_capture_hotkey("start")
     )
     app.start_hotkey_btn.pack(side=tk.LEFT, padx=2)
     ttk.Label(hotkey_frame, text="Stop hotkey:", width=10, anchor=tk.W).pack(side=tk.LEFT, padx=(8, 4))
-    app.stop_hotkey_var = tk.StringVar(value=app.stop_hotkey.upper())
+    app.stop_hotkey_var = tk.StringVar(value=key_name(app.stop_hotkey).upper())
     app.stop_hotkey_btn = ttk.Button(
-        hotkey_frame, text=app.stop_hotkey.upper(), width=8,
+        hotkey_frame, text=key_name(app.stop_hotkey).upper(), width=8,
         command=lambda: app._begin_capture_hotkey("stop")
     )
     app.stop_hotkey_btn.pack(side=tk.LEFT, padx=2)
@@ -94,6 +112,23 @@ def build_ui(root, app):
     app.status_label = ttk.Label(hotkey_frame, textvariable=app.status_var, font=("Segoe UI", 10, "bold"))
     app.status_label.pack(side=tk.LEFT)
 
+    turbo_frame = ttk.Frame(main)
+    turbo_frame.pack(fill=tk.X, pady=4)
+    ttk.Label(turbo_frame, text="Turbo (hold):", width=10, anchor=tk.W).pack(side=tk.LEFT, padx=(0, 4))
+    app.turbo_key_btn = ttk.Button(
+        turbo_frame, text=key_name(app.turbo_key).upper() if app.turbo_key is not None else "None", width=8,
+        command=lambda: app._begin_capture_hotkey("turbo")
+    )
+    app.turbo_key_btn.pack(side=tk.LEFT, padx=2)
+    ttk.Button(turbo_frame, text="×", width=2, command=app._clear_turbo_key).pack(side=tk.LEFT)
+    ttk.Label(turbo_frame, text="every", anchor=tk.W).pack(side=tk.LEFT, padx=(8, 4))
+    app.turbo_interval_var = tk.StringVar(value=str(DEFAULT_TURBO_INTERVAL_MS))
+    ttk.Entry(
+        turbo_frame, textvariable=app.turbo_interval_var, width=6,
+        validate="key", validatecommand=vcmd
+    ).pack(side=tk.LEFT, padx=2)
+    ttk.Label(turbo_frame, text="ms while held", anchor=tk.W).pack(side=tk.LEFT, padx=2)
+
     btn_frame = ttk.Frame(main)
     btn_frame.pack(fill=tk.X, pady=2)
     ttk.Button(btn_frame, text="Save as...", command=app._save_config).pack(side=tk.LEFT, padx=4)
@@ -103,6 +138,9 @@ def build_ui(root, app):
     app.log_enabled_var = tk.BooleanVar(value=False)
     ttk.Checkbutton(btn_frame, text="Enable log", variable=app.log_enabled_var).pack(side=tk.LEFT, padx=(16, 0))
     ttk.Button(btn_frame, text="View log", command=app._view_log).pack(side=tk.LEFT, padx=4)
+    app.trace_enabled_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(btn_frame, text="Trace", variable=app.trace_enabled_var, command=app._toggle_trace).pack(side=tk.LEFT, padx=(12, 0))
+    ttk.Button(btn_frame, text="Export trace", command=app._export_trace).pack(side=tk.LEFT, padx=4)
     app.size_hint_var = tk.StringVar(value="")
     ttk.Label(btn_frame, textvariable=app.size_hint_var, font=("Segoe UI", 9), foreground="gray").pack(side=tk.RIGHT, padx=4)
     root.bind("<Configure>", app._on_configure)
@@ -120,20 +158,9 @@ def _add_browse_button(parent, app, root):
     def browse():
         path = filedialog.askopenfilename(parent=root, title="Select executable", filetypes=filetypes)
         if path:
+            current = app.target_exe_var.get().strip()
+            if current and messagebox.askyesno("Target app", "Add to the current target list?\n(No replaces it.)"):
+                path = current + os.pathsep + path
             app.target_exe_var.set(path)
 
     ttk.Button(parent, text="Browse", command=browse).pack(side=tk.LEFT, padx=2)
-
-
-def _add_key_button(parent, item, app):
-    label, key_id = item[0], item[1]
-    w = item[2] if len(item) > 2 else (4 if len(label) <= 2 else 6)
-    btn = tk.Button(
-        parent, text=label, width=w,
-        relief=tk.RAISED, bd=2, cursor="hand2",
-        command=lambda k=key_id: app._toggle_key(k)
-    )
-    btn.pack(side=tk.LEFT, padx=1, pady=1)
-    if key_id not in app.key_buttons:
-        app.key_buttons[key_id] = []
-    app.key_buttons[key_id].append(btn)
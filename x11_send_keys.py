@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Send keystrokes to a specific X11 window via XSendEvent. Used when target app is set on Linux."""
+import sys
+import threading
+
+if not sys.platform.startswith("linux"):
+    raise RuntimeError("x11_send_keys is Linux-only")
+
+from Xlib import X
+from Xlib.protocol import event
+
+from foreground_exe import get_x11_display
+from keycodes import X11_KEYSYMS
+
+_keycode_cache = {}
+_send_lock = threading.Lock()
+
+
+def code_to_keycode(code: int) -> int | None:
+    """Return the X11 keycode for a key code on the current display, or None if unknown."""
+    keycode = _keycode_cache.get(code)
+    if keycode is None:
+        keysym = X11_KEYSYMS[code] if 0 <= code < len(X11_KEYSYMS) else 0
+        keycode = get_x11_display().keysym_to_keycode(keysym) if keysym else 0
+        _keycode_cache[code] = keycode
+    return keycode or None
+
+
+def _codes_to_events(codes) -> list[tuple[int, int]]:
+    events = []
+    for code in codes:
+        keycode = code_to_keycode(code)
+        if keycode:
+            events.append((keycode, 0))
+    return events
+
+
+def send_keys_to_window(window_id: int, codes) -> int:
+    """
+    Send key press and release for each key code to the given X11 window, then flush once.
+    Returns the number of keys sent (unknown keys are skipped).
+    """
+    return send_key_events_to_window(window_id, _codes_to_events(codes))
+
+
+def send_keys_to_windows(window_ids, codes) -> list[int]:
+    """Send the same keys to each window, in order, with one flush for all of them. Returns keys sent per window."""
+    return send_key_events_to_windows(window_ids, _codes_to_events(codes))
+
+
+# keysyms for characters that are not their own code point.
+_CHAR_KEYSYMS = {"\n": 0xFF0D, "\r": 0xFF0D, "\t": 0xFF09, "\b": 0xFF08}
+
+
+def _char_keysym(ch: str) -> int:
+    keysym = _CHAR_KEYSYMS.get(ch)
+    if keysym is None:
+        cp = ord(ch)
+        keysym = cp if 0x20 <= cp < 0x7F or 0xA0 <= cp <= 0xFF else 0x01000000 | cp
+    return keysym
+
+
+def text_to_key_events(text: str) -> list[tuple[int, int]]:
+    """
+    Map text to (keycode, modifier state) pairs on the current keyboard mapping: plain or Shift level.
+    Characters the mapping cannot produce are dropped. Done once per text, not per round.
+    """
+    d = get_x11_display()
+    events = []
+    cache = {}
+    for ch in text.replace("\r\n", "\n"):
+        ev = cache.get(ch)
+        if ev is None:
+            keysym = _char_keysym(ch)
+            keycode = d.keysym_to_keycode(keysym)
+            ev = 0
+            if keycode:
+                if d.keycode_to_keysym(keycode, 0) == keysym:
+                    ev = (keycode, 0)
+                elif d.keycode_to_keysym(keycode, 1) == keysym:
+                    ev = (keycode, X.ShiftMask)
+            cache[ch] = ev
+        if ev:
+            events.append(ev)
+    return events
+
+
+def send_key_events_to_window(window_id: int, events) -> int:
+    """Send press + release for each (keycode, modifier state) pair to the given X11 window, then flush once."""
+    return send_key_events_to_windows((window_id,), events)[0]
+
+
+def send_key_events_to_windows(window_ids, events) -> list[int]:
+    """
+    Send press + release for each (keycode, modifier state) pair to every window, in order, then flush
+    once. All windows share one display connection, so a round is written as one batch rather than
+    from several threads (the lock only keeps other callers' requests from interleaving).
+    """
+    d = get_x11_display()
+    with _send_lock:
+        root = d.screen().root
+        for window_id in window_ids:
+            win = d.create_resource_object("window", window_id)
+            for keycode, state in events:
+                for ev_cls, mask in ((event.KeyPress, X.KeyPressMask), (event.KeyRelease, X.KeyReleaseMask)):
+                    ev = ev_cls(
+                        time=X.CurrentTime, root=root, window=win, same_screen=1, child=X.NONE,
+                        root_x=0, root_y=0, event_x=0, event_y=0, state=state, detail=keycode,
+                    )
+                    win.send_event(ev, event_mask=mask, propagate=True)
+        d.flush()
+    return [len(events)] * len(window_ids)